@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import-time benchmark of the brml package.
+
+    python benchimport.py                    # run, write imports.json
+    python benchimport.py --save-baseline    # run, write importbaseline.json
+    python benchimport.py --compare          # run, compare with the baseline
+
+Every case is a statement run in a fresh interpreter (best of --repeat
+interpreters); the time of the statement and the number of brml modules it
+loaded are recorded. "import brml" should load the package __init__ only,
+whatever the number of subsystems, and each attribute access only the
+modules it needs. --compare exits with status 1 if a case is slower than
+--tolerance times its baseline or loads more brml modules than it did.
+"""
+import sys
+import os
+import json
+import argparse
+import platform
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+CASES = [
+    ('import brml', 'import brml'),
+    ('brml.Potential', 'import brml; brml.Potential'),
+    ('brml.setpot', 'import brml; brml.setpot'),
+    ('brml.JunctionTree', 'import brml; brml.JunctionTree'),
+    ('brml.HMM', 'import brml; brml.HMM'),
+    ('brml.learnpotem', 'import brml; brml.learnpotem'),
+    ('brml.QueryExecutor', 'import brml; brml.QueryExecutor'),
+    ('brml.server', 'import brml; brml.server'),
+    ('from brml import *', 'from brml import *'),
+]
+
+SCRIPT = '''
+import sys, time, json
+sys.path.insert(0, %r)
+start = time.perf_counter()
+exec(%r)
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'modules':
+      len([m for m in sys.modules if m.split('.')[0] == 'brml'])}))
+'''
+
+
+def measure(statement, repeat=5):
+    """Best time and number of brml modules of statement (fresh runs)."""
+    best = None
+    for i in range(repeat):
+        out = subprocess.run([sys.executable, '-c',
+                              SCRIPT % (ROOT, statement)],
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def run(repeat=5):
+    results = {}
+    modules = {}
+    for name, statement in CASES:
+        best = measure(statement, repeat)
+        results[name] = best['seconds']
+        modules[name] = best['modules']
+        print('%-24s %12.6f s %4d modules' % (name, best['seconds'],
+                                               best['modules']))
+    return {'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+            'modules': modules}
+
+
+def compare(results, baseline, tolerance):
+    """Return the cases slower than tolerance times their baseline."""
+    regressions = []
+    for name, seconds in sorted(results['results'].items()):
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = seconds / old
+        more = results['modules'][name] > baseline['modules'].get(name, 0)
+        flag = ''
+        if ratio > tolerance or more:
+            regressions.append((name, old, seconds))
+            flag = '  REGRESSION'
+        print('%-24s %12.6f -> %12.6f  x%.2f  %d -> %d modules%s'
+              % (name, old, seconds, ratio, baseline['modules'].get(name, 0),
+                 results['modules'][name], flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=os.path.join(HERE,
+                                                         'imports.json'))
+    parser.add_argument('--baseline',
+                        default=os.path.join(HERE, 'importbaseline.json'))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    output = args.baseline if args.save_baseline else args.output
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks of the potential operations and of end-to-end queries.
+
+    python benchpots.py                      # run, write results.json
+    python benchpots.py --save-baseline      # run, write baseline.json
+    python benchpots.py --compare            # run, compare with baseline.json
+
+Every case is timed with timeit (best of --repeat runs). Results are saved
+as JSON keyed by case name; --compare exits with status 1 if a case is
+slower than --tolerance times its baseline. Timings depend on the machine,
+so the baseline should be regenerated with --save-baseline on the machine
+the comparison runs on.
+"""
+import sys
+sys.path.append("..")
+import os
+import json
+import timeit
+import argparse
+import platform
+import numpy as np
+from brml.multpots import multpots
+from brml.setpot import setpot
+from brml.condpot import condpot
+from brml.orderpot import orderpot
+from brml.potvariables import potvariables
+from networks import randompot, randomnet, burglarnet, clouseaunet
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def cases(quick=False):
+    """Yield (name, function) for every benchmark case."""
+    rng = np.random.RandomState(0)
+    nvars = [2, 4, 6] if quick else [2, 4, 6, 8, 10]
+    for n in nvars:
+        # two potentials sharing half their variables, binary variables
+        card = [2] * (n + n // 2)
+        a = randompot(list(range(n)), card, rng)
+        b = randompot(list(range(n // 2, n + n // 2)), card, rng)
+        yield 'multpots/vars=%d' % n, lambda a=a, b=b: multpots([a, b])
+        joint = multpots([a, b])
+        ev = np.arange(n // 2)
+        yield 'setpot/vars=%d' % n, \
+            lambda j=joint, ev=ev: setpot(j, ev, np.zeros(ev.size, int))
+        yield 'condpot/vars=%d' % n, lambda j=joint: condpot(j, 0)
+        order = list(joint.variables[::-1])
+        yield 'orderpot/vars=%d' % n, \
+            lambda j=joint, o=order: orderpot(j, o)
+    for card in ([2, 3] if quick else [2, 3, 4]):
+        pot = randomnet(6, 2, card)
+        yield 'multpots/net6/card=%d' % card, lambda p=pot: multpots(p)
+    for N in ([20, 100] if quick else [20, 100, 500]):
+        pot = randomnet(N, 3, 3)
+        yield 'potvariables/net=%d' % N, lambda p=pot: potvariables(p)
+
+    yes = 0
+    for copies in ([1, 2] if quick else [1, 2, 3]):
+        pot = burglarnet(copies)
+        ev = np.array([4 * c + 2 for c in range(copies)])  # the alarms
+
+        def query(pot=pot, ev=ev):
+            states = np.zeros(ev.size, int) + yes
+            return condpot(setpot(multpots(pot), ev, states), 0)
+        yield 'burglar/copies=%d' % copies, query
+    for copies in ([1, 2] if quick else [1, 2, 3, 4]):
+        pot = clouseaunet(copies)
+        knife = 3 * (copies - 1)
+
+        def query(pot=pot, knife=knife):
+            return condpot(setpot(multpots(pot), knife, 0), 2)
+        yield 'clouseau/copies=%d' % copies, query
+
+
+def run(quick=False, repeat=5):
+    results = {}
+    for name, fn in cases(quick):
+        number = 1
+        # run long enough that timer resolution does not matter
+        while min(timeit.repeat(fn, number=number, repeat=1)) < 0.05 and \
+                number < 1000:
+            number *= 10
+        best = min(timeit.repeat(fn, number=number, repeat=repeat))
+        results[name] = best / number
+        print('%-28s %12.6f s' % (name, results[name]))
+    return {'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'results': results}
+
+
+def compare(results, baseline, tolerance):
+    """Return the cases slower than tolerance times their baseline."""
+    regressions = []
+    for name, seconds in sorted(results['results'].items()):
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = seconds / old
+        flag = ''
+        if ratio > tolerance:
+            regressions.append((name, old, seconds))
+            flag = '  REGRESSION'
+        print('%-28s %12.6f -> %12.6f  x%.2f%s' % (name, old, seconds,
+                                                  ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--quick', action='store_true',
+                        help='smaller sizes only')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=os.path.join(HERE,
+                                                         'results.json'))
+    parser.add_argument('--baseline', default=os.path.join(HERE,
+                                                           'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    results = run(args.quick, args.repeat)
+    output = args.baseline if args.save_baseline else args.output
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
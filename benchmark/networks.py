@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic networks for the benchmarks.
+"""
+import sys
+sys.path.append("..")
+import numpy as np
+from brml.potential import Potential
+
+
+def randompot(variables, card, rng):
+    """Random potential on variables, normalised over the first one."""
+    pot = Potential()
+    pot.variables = np.array(variables)
+    pot.card = np.array([card[v] for v in variables])
+    table = rng.uniform(0.1, 1.0, tuple(pot.card))
+    pot.table = table / table.sum(axis=0, keepdims=True)
+    return pot
+
+
+def randomnet(N, maxparents=2, nstates=2, seed=0):
+    """
+    Random Belief Network on variables 0..N-1 in which pot[i] is
+    p(i|pa(i)) and the parents of i are drawn from the variables before it.
+    """
+    rng = np.random.RandomState(seed)
+    card = [nstates] * N
+    pot = []
+    for i in range(N):
+        k = min(i, rng.randint(0, maxparents + 1))
+        pa = sorted(rng.choice(i, k, replace=False)) if k else []
+        pot.append(randompot([i] + list(pa), card, rng))
+    return pot
+
+
+def burglarnet(copies=1):
+    """
+    copies of the demoBurglar network (burglar, earthquake, alarm, radio)
+    side by side, with the alarm of copy c also depending on the alarm of
+    copy c-1 so that the network is connected.
+    """
+    yes, no = 0, 1
+    pot = []
+    for c in range(copies):
+        burglar, earthquake, alarm, radio = 4 * c + np.arange(4)
+        p = Potential()
+        p.variables = np.array([burglar])
+        p.card = np.array([2])
+        p.table = np.array([0.01, 0.99])
+        pot.append(p)
+        p = Potential()
+        p.variables = np.array([earthquake])
+        p.card = np.array([2])
+        p.table = np.array([0.000001, 0.999999])
+        pot.append(p)
+        table = np.zeros((2, 2, 2))
+        table[yes, yes, yes] = 0.9999
+        table[yes, yes, no] = 0.99
+        table[yes, no, yes] = 0.99
+        table[yes, no, no] = 0.0001
+        if c == 0:
+            variables = [alarm, burglar, earthquake]
+        else:
+            variables = [alarm, burglar, earthquake, alarm - 4]
+            table = np.stack([0.9 * table + 0.05, 0.5 * table], axis=-1)
+        table[no] = 1 - table[yes]
+        p = Potential()
+        p.variables = np.array(variables)
+        p.card = np.array([2] * len(variables))
+        p.table = table
+        pot.append(p)
+        p = Potential()
+        p.variables = np.array([radio, earthquake])
+        p.card = np.array([2, 2])
+        p.table = np.array([[1.0, 0.0], [0.0, 1.0]])
+        pot.append(p)
+    return pot
+
+
+def clouseaunet(copies=1):
+    """
+    copies of the demoClouseau network (knife, maid, butler) chained by
+    letting the butler of copy c depend on the knife of copy c-1.
+    """
+    pot = []
+    for c in range(copies):
+        knife, maid, butler = 3 * c + np.arange(3)
+        p = Potential()
+        if c == 0:
+            p.variables = np.array([butler])
+            p.card = np.array([2])
+            p.table = np.array([0.6, 0.4])
+        else:
+            p.variables = np.array([butler, knife - 3])
+            p.card = np.array([2, 2])
+            p.table = np.array([[0.7, 0.4], [0.3, 0.6]])
+        pot.append(p)
+        p = Potential()
+        p.variables = np.array([maid])
+        p.card = np.array([2])
+        p.table = np.array([0.2, 0.8])
+        pot.append(p)
+        p = Potential()
+        p.variables = np.array([knife, butler, maid])
+        p.card = np.array([2, 2, 2])
+        table = np.zeros((2, 2, 2))
+        table[0] = [[0.1, 0.6], [0.2, 0.3]]
+        table[1] = 1 - table[0]
+        p.table = table
+        pot.append(p)
+    return pot
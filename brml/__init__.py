@@ -3,25 +3,114 @@
 # http://stackoverflow.com/questions/5134893/importing-python-classes-from-different-files-in-a-subdirectory
 # __all__ = ['MyClass01','MyClass02']
 
-from brml.potential import Potential
-from brml.variable import Variable
-from brml.multpots import multpots
-from brml.dag import dag
-from brml.intersect import intersect
-from brml.setminus import setminus
-from brml.myzeros import myzeros
-from brml.ismember import ismember
-from brml.setstate import setstate
-from brml.setpot import setpot
-
-
-__all__ = ['potential',
+# The submodules are imported on first attribute access (PEP 562), so that
+# "import brml" does not load numpy, the inference engines or the process
+# pools: brml.Potential imports brml.potential, brml.jtree imports the
+# junction tree module and so on.
+import sys
+import types
+import importlib
+
+# public name -> submodule defining it
+_attributes = {
+    'Potential': 'potential',
+    'Variable': 'variable',
+    'multpots': 'multpots',
+    'dag': 'dag',
+    'SparseDAG': 'sparsedag',
+    'intersect': 'intersect',
+    'setminus': 'setminus',
+    'myzeros': 'myzeros',
+    'ismember': 'ismember',
+    'setstate': 'setstate',
+    'setpot': 'setpot',
+    'count': 'count',
+    'learnpot': 'learnpot',
+    'learnpotem': 'learnpotem',
+    'learnstructure': 'learnstructure',
+    'pcskeleton': 'pcskeleton',
+    'pcorient': 'pcorient',
+    'QueryExecutor': 'parallel',
+    'batchcondpot': 'batchcondpot',
+    'JunctionTree': 'jtree',
+    'HMM': 'hmm',
+    'prunepots': 'prunepots',
+    'entropy': 'information',
+    'condentropy': 'information',
+    'mutualinformation': 'information',
+    'kldivergence': 'information',
+    'voi': 'voi',
+    'minibucket': 'minibucket',
+    'partitionbounds': 'minibucket',
+    'marginalbounds': 'minibucket',
+    'cutsetquery': 'cutset',
+    'loopcutset': 'cutset',
+    'ArithmeticCircuit': 'circuit',
+    'sensitivity': 'sensitivity',
+    'VariableRegistry': 'registry',
+}
+
+
+__all__ = ['logger',
+            'profiler',
+            'chunked',
+            'potential',
             'variable',
             'multpots',
             'dag',
+            'sparsedag',
             'intersect',
             'setminus',
             'myzeros',
             'ismember',
             'setpot',
-            'setstate']
+            'setstate',
+            'count',
+            'learnpot',
+            'learnpotem',
+            'learnstructure',
+            'pcskeleton',
+            'pcorient',
+            'parallel',
+            'batchcondpot',
+            'server',
+            'jtree',
+            'hmm',
+            'prunepots',
+            'information',
+            'voi',
+            'minibucket',
+            'cutset',
+            'circuit',
+            'sensitivity',
+            'lazy',
+            'registry']
+
+
+def __getattr__(name):
+    if name in _attributes:
+        module = importlib.import_module('brml.' + _attributes[name])
+        value = getattr(module, name)
+    elif name in __all__:
+        value = importlib.import_module('brml.' + name)
+    else:
+        raise AttributeError("module 'brml' has no attribute %r" % name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_attributes) | set(__all__))
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # importing the submodule brml.setpot binds it to brml.setpot, which
+        # would hide the function setpot; the function is loaded instead
+        if isinstance(value, types.ModuleType) and \
+                _attributes.get(name) == name:
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+
+
+def batchcondpot(pot, variables, evvariables, evstates):
+    """
+    Return p(variables|evvariables=evstates[b]) for a batch of evidence.
+        tables = batchcondpot(pot, variables, evvariables, evstates)
+
+    The evidence states of every batch entry are indexed into the
+    potentials, which are then contracted with a single einsum over a batch
+    axis; the joint table of the network is never formed.
+
+    Parameters
+    ----------
+
+    pot: list of brml.potential.Potential
+        Potentials whose product is the (unnormalised) joint distribution.
+
+    variables: array_like
+        The query variables.
+
+    evvariables: array_like
+        The evidence variables, the same for the whole batch.
+
+    evstates: array_like
+        B x len(evvariables) integer array, row b holds the evidence states
+        of batch entry b.
+
+    Returns
+    -------
+
+    tables: np.ndarray
+        Array of shape (B,) + card[variables]; tables[b] is the normalised
+        posterior of batch entry b (all zeros if its evidence is
+        impossible).
+    """
+    variables = [int(v) for v in np.asarray(variables).reshape(-1)]
+    evvariables = [int(v) for v in np.asarray(evvariables).reshape(-1)]
+    evstates = np.asarray(evstates, dtype=np.intp).reshape(-1,
+                                                           len(evvariables))
+    B = evstates.shape[0]
+    evcol = dict((v, i) for i, v in enumerate(evvariables))
+
+    labels = {}
+    card = {}
+    operands = [np.ones(B), [0]]
+    for p in pot:
+        pvars = [int(v) for v in np.asarray(p.variables).reshape(-1)]
+        if not pvars:
+            continue
+        table = np.asarray(p.table, dtype=float)
+        for v, n in zip(pvars, table.shape):
+            card[v] = n
+        isev = [v in evcol for v in pvars]
+        order = [i for i, e in enumerate(isev) if e] + \
+                [i for i, e in enumerate(isev) if not e]
+        table = np.transpose(table, order)
+        ev = [pvars[i] for i in order if isev[i]]
+        free = [pvars[i] for i in order if not isev[i]]
+        subs = [labels.setdefault(v, len(labels) + 1) for v in free]
+        if ev:
+            states = evstates[:, [evcol[v] for v in ev]]
+            bad = (states < 0) | (states >= np.array(table.shape[:len(ev)]))
+            if bad.any():
+                b, i = np.argwhere(bad)[0]
+                raise ValueError('state %d of variable %d is out of range'
+                                 % (states[b, i], ev[i]))
+            table = table[tuple(states.T)]
+            subs = [0] + subs
+        operands += [table, subs]
+    for v in variables:
+        if v not in labels:
+            raise ValueError('query variable %d is not a free variable of '
+                             'the potentials' % v)
+    if len(labels) > 51:
+        raise ValueError('too many free variables for one contraction')
+    out = [0] + [labels[v] for v in variables]
+    table = np.einsum(*(operands + [out]), optimize=True)
+    table = table.reshape((B,) + tuple(card[v] for v in variables))
+    norm = table.reshape(B, -1).sum(axis=1)
+    norm = np.where(norm > 0, norm, 1).reshape((B,) + (1,) * len(variables))
+    return table / norm
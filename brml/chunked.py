@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Multithreaded table kernels for large potentials.
+
+multiply() and sumout() are the kernels behind Potential.__mul__ and the
+marginalisation in condpot. When threading is enabled with
+    brml.chunked.setthreads(8, mincells=10**7)
+an operation whose output (multiply) or input (sumout) has at least
+mincells cells is split into chunks along its outer axes; the chunks are
+computed by a thread pool and written into one preallocated output. There
+are about four contiguous chunks per thread, whatever the shape. NumPy
+releases the GIL inside these loops, so the chunks run in parallel. With
+the default of one thread the kernels are plain NumPy calls.
+"""
+import itertools
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+options = {'threads': 1, 'mincells': 10 ** 7}
+# one executor per number of threads; they are never shut down, as another
+# thread may be using them
+_pools = {}
+_lock = threading.Lock()
+
+
+def setthreads(threads, mincells=None):
+    """Use threads threads for operations on at least mincells cells."""
+    options['threads'] = max(int(threads), 1)
+    if mincells is not None:
+        options['mincells'] = int(mincells)
+
+
+def multiply(a, b, threads=None):
+    """
+    Broadcasting product of the tables a and b (both with the same number
+    of dimensions, size-1 axes are broadcast).
+    """
+    a = np.asarray(a)
+    b = np.asarray(b)
+    shape = np.broadcast_shapes(a.shape, b.shape)
+    out = np.empty(shape, dtype=np.result_type(a, b))
+    blocks = _blocks(shape, int(np.prod(shape)), threads)
+    if blocks is None:
+        np.multiply(a, b, out=out)
+        return out
+
+    def work(idx):
+        np.multiply(a[_index(a, idx)], b[_index(b, idx)],
+                    out=out[idx + (Ellipsis,)])
+    _run(work, blocks, threads)
+    return out
+
+
+def sumout(table, axes, threads=None):
+    """Sum table over axes (a sequence of axis numbers)."""
+    table = np.asarray(table)
+    axes = tuple(sorted(int(a) for a in axes))
+    keep = [i for i in range(table.ndim) if i not in axes]
+    if not axes:
+        return table.copy()
+    blocks = _blocks([table.shape[i] for i in keep], table.size, threads)
+    if blocks is None:
+        if not keep:
+            # a full sum split along the first axis
+            blocks = _blocks(table.shape[:1], table.size, threads)
+            if blocks is not None:
+                parts = [None] * len(blocks)
+
+                def work(i):
+                    parts[i] = np.sum(table[blocks[i]])
+                _run(work, range(len(blocks)), threads)
+                return np.sum(parts)
+        return np.sum(table, axis=axes)
+
+    out = np.empty([table.shape[i] for i in keep],
+                   dtype=np.add.reduce(np.zeros(1, table.dtype)).dtype)
+    # the leading kept axes are fixed in a block (the last one to a range),
+    # the summed axes keep their relative order in the indexed table
+    k = len(blocks[0])
+    fixed = keep[:k]
+    rest = [i for i in range(table.ndim) if i not in fixed[:-1]]
+    suminrest = tuple(rest.index(a) for a in axes)
+
+    def work(idx):
+        tidx = [slice(None)] * table.ndim
+        for axis, i in zip(fixed, idx):
+            tidx[axis] = i
+        np.sum(table[tuple(tidx)], axis=suminrest,
+               out=out[idx + (Ellipsis,)])
+    _run(work, blocks, threads)
+    return out
+
+
+def _blocks(shape, cells, threads):
+    """
+    Index tuples of about four contiguous blocks per thread, or None if the
+    operation should not be split. The blocks fix the axes of the smallest
+    prefix of shape with at least that many cells: all but the last one to
+    an index, the last one to a range.
+    """
+    threads = threads or options['threads']
+    if threads <= 1 or cells < options['mincells'] or len(shape) == 0:
+        return None
+    nblocks = 4 * threads
+    k, n = 0, 1
+    while k < len(shape) and n < nblocks:
+        n *= shape[k]
+        k += 1
+    if n < 2:
+        return None
+    # fewer than nblocks combinations of the outer indices, each split into
+    # ranges of the last axis of the prefix
+    outer = n // shape[k - 1]
+    pieces = min(shape[k - 1], -(-nblocks // outer))
+    bounds = np.linspace(0, shape[k - 1], pieces + 1).astype(int)
+    ranges = [slice(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:])]
+    return [idx + (r,)
+            for idx in itertools.product(*[range(s) for s in shape[:k - 1]])
+            for r in ranges]
+
+
+def _index(x, idx):
+    # the block idx of x, which may have broadcast (size 1) axes
+    return tuple(i if x.shape[j] > 1
+                 else (slice(None) if isinstance(i, slice) else 0)
+                 for j, i in enumerate(idx))
+
+
+def _run(work, blocks, threads):
+    threads = threads or options['threads']
+    with _lock:
+        if threads not in _pools:
+            _pools[threads] = ThreadPoolExecutor(threads)
+        executor = _pools[threads]
+    for f in [executor.submit(work, b) for b in blocks]:
+        f.result()
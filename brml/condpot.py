@@ -11,7 +11,10 @@ import numpy as np
 from .potential import Potential
 from .intersect import intersect
 from .setminus import setminus
+from .logger import traced
+from .chunked import sumout
 
+@traced('condpot')
 def condpot(pot,varargin):
     #FIXME: only 1 varargin supported , use *arg in further development
     newpot = Potential()
@@ -36,7 +39,10 @@ def condpot(pot,varargin):
     #print("other_axis=", other_axis)
     #print("Full_axis:", FULL_axis)
     #print("other_axis:", other_axis)
-    newpot.table = np.apply_over_axes(np.sum, pot.table, other_axis)
+    # sum out the other axes and put the rest in the order of intersection
+    newpot.table = sumout(pot.table, other_axis)
+    newpot.table = np.transpose(newpot.table, np.argsort(np.argsort(ipot)))
+    newpot.card = np.array(newpot.table.shape)
     #print("newpot.variables:", newpot.variables)
     #print("newpot.table: \n", newpot.table)
 
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+
+
+def count(data, nstates, variables=None):
+    """
+    Count the joint states of (a subset of) the columns of a data matrix.
+        counts = count(data, nstates, <variables>)
+
+    The counting is done with a single np.bincount over the linear indices
+    of the joint states, so no Python loop runs over the rows.
+
+    Parameters
+    ----------
+
+    data: array_like or iterator of array_like
+        Integer data matrix, one row per observation and one column per
+        variable; state s of a variable is coded as the integer s (starting
+        from 0). An iterator of such matrices (chunks) is also accepted, in
+        which case the chunks are counted one at a time and summed, so the
+        full data set never needs to be held in memory.
+
+    nstates: array_like
+        Number of states of every column of data.
+
+    variables: array_like (optional)
+        The columns to count. If missing or None, all columns are counted.
+
+    Returns
+    -------
+
+    counts: np.ndarray
+        Table of shape nstates[variables]; counts[s1, s2, ...] is the number
+        of rows in which variables are in the joint state (s1, s2, ...).
+    """
+    nstates = np.asarray(nstates, dtype=int)
+    if variables is None:
+        variables = np.arange(nstates.size)
+    variables = np.asarray(variables, dtype=int).reshape(-1)
+    dims = tuple(nstates[variables])
+
+    counts = np.zeros(int(np.prod(dims)), dtype=int)
+    for chunk in datachunks(data):
+        counts += np.bincount(linearindex(chunk, nstates, variables),
+                              minlength=counts.size)
+    return counts.reshape(dims)
+
+
+def linearindex(data, nstates, variables):
+    """
+    Return the linear (C order) index of the joint state of variables in
+    each row of data, with the same layout as a table of shape
+    nstates[variables].
+    """
+    data = np.asarray(data)
+    nstates = np.asarray(nstates, dtype=int)
+    variables = np.asarray(variables, dtype=int).reshape(-1)
+    if variables.size == 0:
+        return np.zeros(data.shape[0], dtype=np.intp)
+    return np.ravel_multi_index(tuple(data[:, variables].T),
+                                tuple(nstates[variables]))
+
+
+def compressdata(data, N):
+    """Return the distinct rows of data and the number of times each occurs."""
+    rows, weights = [], []
+    for chunk in datachunks(data):
+        if chunk.shape[1] != N:
+            raise ValueError('data should have one column per variable')
+        u, c = np.unique(chunk, axis=0, return_counts=True)
+        rows.append(u)
+        weights.append(c)
+    rows, inverse = np.unique(np.concatenate(rows), axis=0,
+                              return_inverse=True)
+    weights = np.bincount(inverse.reshape(-1),
+                          weights=np.concatenate(weights))
+    return rows, weights
+
+
+def datachunks(data):
+    """
+    Iterate over the chunks of data: a single array (or nested list) is
+    returned as one chunk, any other iterable is taken to yield chunks.
+    """
+    if isinstance(data, (np.ndarray, list, tuple)):
+        data = [data]
+    for chunk in data:
+        chunk = np.asarray(chunk)
+        if chunk.ndim != 2:
+            raise ValueError('data chunks should be 2-D (rows x variables)')
+        yield chunk
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cutset conditioning.
+
+Setting the variables of a loop cutset (and the evidence) with setpot
+turns the network into a forest of polytrees, on which variable
+elimination is exact and linear in the size of the tables. p(variables|e)
+is the sum of the forest results over all instantiations of the cutset:
+
+    posterior = cutsetquery(pot, [x], evvariables, evstates,
+                            budget=2**26, workers=4)
+
+The forest splits into connected components, and the result of a component
+only depends on the states of the cutset variables it contains (its
+context). These results are kept in a least recently used cache of at most
+budget bytes, so instantiations that agree on a context reuse them: a
+larger budget trades memory for time, budget=0 recomputes everything. With
+workers > 1 the instantiations are split into chunks evaluated by a pool of
+processes (each with its own cache).
+"""
+import os
+import collections
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from brml.potential import Potential
+from brml.setpot import setpot
+from brml.chunked import sumout
+from brml.jtree import minfillorder
+
+
+def cutsetquery(pot, variables, evvariables=(), evstates=(), cutset=None,
+                budget=2 ** 26, workers=1):
+    """
+    Return the potential p(variables|evvariables=evstates). The observed
+    query variables are set to their states; the table is zero if the
+    evidence has probability zero.
+
+    cutset: variables to condition on (loopcutset() if missing); they must
+    break every loop of the network once the evidence is set
+    budget: bytes of component results to cache
+    workers: number of processes
+    """
+    variables = np.unique(np.asarray(variables, dtype=int).reshape(-1))
+    evvariables = np.asarray(evvariables, dtype=int).reshape(-1)
+    evstates = np.asarray(evstates, dtype=int).reshape(-1)
+    card = {}
+    for p in pot:
+        for v, n in zip(np.asarray(p.variables).reshape(-1),
+                        np.shape(p.table)):
+            card[int(v)] = int(n)
+    pot = [_clamp(p, evvariables, evstates) for p in pot]
+    # the potentials whose variables are all observed are constants
+    with np.errstate(divide='ignore'):
+        logconstant = sum(np.log(np.sum(p.table)) for p in pot
+                          if np.asarray(p.variables).size == 0)
+    # the observed query variables are fixed to their states in the result
+    observed = dict((int(v), int(s)) for v, s in zip(evvariables, evstates))
+    free = np.array([v for v in variables if v not in observed], dtype=int)
+    if cutset is None:
+        cutset = loopcutset(pot, prefer=free)
+    cutset = [int(v) for v in np.asarray(cutset).reshape(-1)
+              if int(v) in card and int(v) not in observed]
+    ninst = int(np.prod([card[v] for v in cutset]))
+
+    state = (pot, free, cutset, card, budget)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=_initworker,
+                                   initargs=state)
+        with pool:
+            nchunks = min(ninst, 4 * workers)
+            bounds = np.linspace(0, ninst, nchunks + 1).astype(int)
+            parts = list(pool.map(_workerchunk, bounds[:-1], bounds[1:]))
+    else:
+        parts = [Conditioner(*state).chunk(0, ninst)]
+
+    newpot = Potential()
+    newpot.variables = variables
+    newpot.card = np.array([card[v] for v in variables], dtype=int)
+    newpot.table = np.zeros(newpot.card)
+    scale = max(s for t, s in parts)
+    if np.isfinite(scale + logconstant):
+        table = sum(t * np.exp(s - scale) for t, s in parts
+                    if np.isfinite(s))
+        index = tuple(observed[v] if v in observed else slice(None)
+                      for v in variables)
+        newpot.table[index] = np.reshape(table, [card[v] for v in free])
+    # a zero table if the evidence is impossible
+    total = np.sum(newpot.table)
+    if total > 0:
+        newpot.table = newpot.table / total
+    return newpot
+
+
+def loopcutset(pot, prefer=()):
+    """
+    Greedy loop cutset of the factor graph of pot: leaves are removed until
+    only loops are left, then the variable with the most factors is added
+    to the cutset (variables in prefer last) and removed.
+    """
+    prefer = set(int(v) for v in np.asarray(prefer).reshape(-1))
+    factors = [set(int(v) for v in np.asarray(p.variables).reshape(-1))
+               for p in pot]
+    factors = dict((i, f) for i, f in enumerate(factors) if f)
+    cutset = []
+    while True:
+        changed = True
+        while changed:
+            changed = False
+            degree = collections.Counter(v for f in factors.values()
+                                         for v in f)
+            for i in list(factors):
+                # variables only in this factor are leaves
+                factors[i] = set(v for v in factors[i] if degree[v] > 1)
+                if len(factors[i]) <= 1:
+                    del factors[i]
+                    changed = True
+        if not factors:
+            return cutset
+        degree = collections.Counter(v for f in factors.values() for v in f)
+        v = max(degree, key=lambda u: (u not in prefer, degree[u], -u))
+        cutset.append(v)
+        for f in factors.values():
+            f.discard(v)
+
+
+class Conditioner:
+    """Forest results for the instantiations of a cutset, with a cache."""
+    def __init__(self, pot, variables, cutset, card, budget):
+        self.pot = pot
+        self.variables = [int(v) for v in variables]
+        self.cutset = cutset
+        self.card = card
+        self.budget = budget
+        self.cache = collections.OrderedDict()
+        self.cachebytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.components = _components(pot, cutset, self.variables)
+
+    def chunk(self, start, stop):
+        """
+        Sum of the results of instantiations start..stop-1 as a flat table
+        over the query variables and its log scale.
+        """
+        size = int(np.prod([self.card[v] for v in self.variables]))
+        table = np.zeros(size)
+        logscale = -np.inf
+        shape = [self.card[v] for v in self.cutset]
+        for index in range(start, stop):
+            states = np.unravel_index(index, shape) if shape else ()
+            t, s = self.instantiation(dict(zip(self.cutset,
+                                               (int(x) for x in states))))
+            if not np.isfinite(s):
+                continue
+            if s > logscale:
+                table *= np.exp(logscale - s) if np.isfinite(logscale) else 0
+                logscale = s
+            table += t.reshape(-1) * np.exp(s - logscale)
+        return table, logscale
+
+    def instantiation(self, states):
+        """
+        Unnormalised p(variables, evidence, cutset=states) as a table over
+        the query variables and its log scale.
+        """
+        result = Potential()
+        logscale = 0.0
+        for c, (factors, context, keep) in enumerate(self.components):
+            key = (c, tuple(states[v] for v in context))
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                p, s = self.cache[key]
+            else:
+                self.misses += 1
+                clamped = [_clamp(self.pot[i], np.array(context),
+                                  np.array(key[1])) for i in factors]
+                p, s = _eliminate(clamped, keep)
+                self._store(key, (p, s))
+            result = result * p
+            logscale += s
+        if not np.isfinite(logscale):
+            return None, -np.inf
+        # the query variables in the cutset are fixed to their states
+        table = np.zeros([self.card[v] for v in self.variables])
+        index = tuple(states[v] if v in states else slice(None)
+                      for v in self.variables)
+        free = [v for v in self.variables if v not in states]
+        if free:
+            rvars = list(np.asarray(result.variables).reshape(-1))
+            table[index] = np.transpose(result.table,
+                                        [rvars.index(v) for v in free])
+        else:
+            table[index] = 1.0
+        return table, logscale
+
+    def _store(self, key, value):
+        size = np.asarray(value[0].table).nbytes + 64
+        if size > self.budget:
+            return
+        self.cache[key] = value
+        self.cachebytes += size
+        while self.cachebytes > self.budget:
+            k, v = self.cache.popitem(last=False)
+            self.cachebytes -= np.asarray(v[0].table).nbytes + 64
+
+
+def _clamp(p, evvariables, evstates):
+    mask = np.isin(evvariables, p.variables)
+    if not mask.any():
+        return p
+    return setpot(p, evvariables[mask], evstates[mask])
+
+
+def _components(pot, cutset, variables):
+    # connected components of the factors once the cutset is removed, with
+    # the cutset variables (context) they depend on
+    cut = set(cutset)
+    parent = {}
+
+    def find(v):
+        while parent.setdefault(v, v) != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    scopes = [[int(v) for v in np.asarray(p.variables).reshape(-1)]
+              for p in pot]
+    for i, scope in enumerate(scopes):
+        free = [('v', v) for v in scope if v not in cut]
+        for node in free:
+            parent[find(node)] = find(('f', i))
+    groups = collections.OrderedDict()
+    for i, scope in enumerate(scopes):
+        if scope:
+            groups.setdefault(find(('f', i)), []).append(i)
+    components = []
+    for factors in groups.values():
+        vs = set(v for i in factors for v in scopes[i])
+        context = sorted(vs & cut)
+        components.append((factors, context,
+                           sorted((vs - cut) & set(variables))))
+    return components
+
+
+def _eliminate(factors, keep):
+    """
+    Sum the product of factors over all their variables but keep (variable
+    elimination along a min-fill order). Returns the potential on keep and
+    a log scale.
+    """
+    logscale = 0.0
+    for f in factors:
+        if np.asarray(f.variables).size == 0:
+            # a factor whose variables are all set is a constant
+            with np.errstate(divide='ignore'):
+                logscale += np.log(np.sum(f.table))
+    factors = [f for f in factors if np.asarray(f.variables).size]
+    order = [v for v in minfillorder(factors) if v not in keep]
+    for v in order:
+        bucket = [f for f in factors if v in np.asarray(f.variables)]
+        factors = [f for f in factors if v not in np.asarray(f.variables)]
+        p = bucket[0]
+        for q in bucket[1:]:
+            p = p * q
+        pvars = np.asarray(p.variables).reshape(-1)
+        axis = list(pvars).index(v)
+        table = sumout(p.table, [axis])
+        scale = np.max(table)
+        if scale <= 0:
+            return Potential(), -np.inf
+        logscale += np.log(scale)
+        if np.ndim(table) == 0:
+            continue
+        h = Potential()
+        h.variables = np.delete(pvars, axis)
+        h.card = np.array(np.shape(table))
+        h.table = table / scale
+        factors.append(h)
+    result = Potential()
+    for f in factors:
+        result = result * f
+    return result, logscale
+
+
+_worker = {}
+
+
+def _initworker(pot, variables, cutset, card, budget):
+    _worker['conditioner'] = Conditioner(pot, variables, cutset, card, budget)
+
+
+def _workerchunk(start, stop):
+    return _worker['conditioner'].chunk(start, stop)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Hidden Markov models and dynamic Bayesian networks.
+
+An HMM is given by potentials p(h1), p(h'|h) and one emission potential
+p(v|h) per observed variable (child first, as everywhere in brml):
+
+    model = HMM(prior, transition, [emission])
+    for logalpha, loglik in model.filter(stream):    # online, O(S) memory
+        ...
+    for t, loggamma in model.smooth(stream, lag=10):  # fixed-lag smoothing
+        ...
+    logalpha, logbeta, loggamma, loglik = model.forwardbackward(obs)
+    path, logprob = model.viterbi(obs)               # most likely paths
+
+A DBN whose hidden slice has several variables is compiled into an HMM
+over their joint state with HMM.fromdbn. All messages are kept in log
+space and normalised at every step.
+
+Observations are integer states, one column per emission potential; a
+negative state is missing and contributes no evidence. The batched methods
+take an N x T x K array (N x T with one emission), shorter sequences are
+padded with missing values or given by lengths.
+"""
+import collections
+import numpy as np
+from brml.multpots import multpots
+
+
+class HMM:
+    def __init__(self, prior, transition, emission):
+        """
+        prior: potential p(h)
+        transition: potential p(h'|h), variables [h', h]
+        emission: potential p(v|h) (variables [v, h]) or a list of them
+        """
+        if not isinstance(emission, (list, tuple)):
+            emission = [emission]
+        h = int(np.asarray(prior.variables).reshape(-1)[0])
+        tvars = [int(v) for v in np.asarray(transition.variables).reshape(-1)]
+        if len(tvars) != 2 or h not in tvars:
+            raise ValueError('transition must be a potential on [h\', h]')
+        hnext = tvars[1 - tvars.index(h)]
+        self.hidden = h
+        self.prior = np.asarray(prior.table, dtype=float).reshape(-1)
+        self.transition = _table([transition], [hnext, h],
+                                 _card([transition]))
+        self.emission = []
+        for e in emission:
+            evars = [int(v) for v in np.asarray(e.variables).reshape(-1)]
+            if len(evars) != 2 or h not in evars:
+                raise ValueError('emission must be a potential on [v, h]')
+            v = evars[1 - evars.index(h)]
+            self.emission.append(_table([e], [v, h], _card([e])))
+        self._setlogs()
+
+    @classmethod
+    def fromdbn(cls, prior, transition, emission, hidden, nexthidden):
+        """
+        HMM over the joint state of the hidden variables of a DBN.
+            model = HMM.fromdbn(prior, transition, emission, hidden, nexthidden)
+
+        prior: potentials over the hidden variables of the first slice
+        transition: potentials over hidden and nexthidden whose product is
+        p(nexthidden|hidden)
+        emission: potentials p(v|pa(v)), pa(v) a subset of hidden, one per
+        observed variable
+        hidden, nexthidden: the variables of two consecutive slices, in
+        corresponding order; the joint state is raveled in this order
+        """
+        card = _card(list(prior) + list(transition) + list(emission))
+        for h, hn in zip(hidden, nexthidden):
+            card.setdefault(hn, card.get(h))
+            card.setdefault(h, card.get(hn))
+        hidden = [int(v) for v in hidden]
+        nexthidden = [int(v) for v in nexthidden]
+        S = int(np.prod([card[v] for v in hidden]))
+        model = cls.__new__(cls)
+        model.hidden = hidden
+        model.prior = _table(list(prior), hidden, card).reshape(S)
+        model.transition = _table(list(transition), nexthidden + hidden,
+                                  card).reshape(S, S)
+        model.emission = []
+        for e in emission:
+            v = int(np.asarray(e.variables).reshape(-1)[0])
+            model.emission.append(
+                _table([e], [v] + hidden, card).reshape(card[v], S))
+        model._setlogs()
+        return model
+
+    def _setlogs(self):
+        with np.errstate(divide='ignore'):
+            self.logprior = np.log(self.prior)
+            self.logemission = [np.log(e) for e in self.emission]
+            self.logtransition = np.log(self.transition)
+        self.nstates = self.prior.size
+
+    def logobs(self, obs):
+        """log p(obs|h) for observations of shape (..., K): shape (..., S)."""
+        obs = np.asarray(obs, dtype=int)
+        if obs.ndim == 0 or obs.shape[-1] != len(self.emission):
+            obs = obs[..., None]
+        out = np.zeros(obs.shape[:-1] + (self.nstates,))
+        for k, logb in enumerate(self.logemission):
+            o = obs[..., k]
+            term = logb[np.maximum(o, 0)]
+            out += np.where((o >= 0)[..., None], term, 0.0)
+        return out
+
+    def filter(self, stream):
+        """
+        Online filtering. Yields (log p(h_t|v_1:t), log p(v_1:t)) for every
+        observation vector of the (possibly unbounded) iterable stream.
+        """
+        return self._forward(stream)
+
+    def smooth(self, stream, lag):
+        """
+        Fixed-lag smoothing. Yields (t, log p(h_t|v_1:t+lag)) as soon as
+        observation t+lag arrives, and the remaining steps (given all the
+        observations) when the stream ends. Only the last lag+1 messages
+        are kept.
+        """
+        lag = int(lag)
+        window = collections.deque(maxlen=lag + 1)
+        t = 0
+        for logalpha, loglik in self._forward(stream, window):
+            if len(window) == lag + 1:
+                yield t - lag, self._smoothwindow(window)[0]
+            t += 1
+        if window:
+            first = t - len(window) + (1 if len(window) == lag + 1 else 0)
+            smoothed = self._smoothwindow(window)
+            for s in range(first, t):
+                yield s, smoothed[s - (t - len(window))]
+
+    def _forward(self, stream, window=None):
+        logalpha = None
+        loglik = 0.0
+        for obs in stream:
+            logb = self.logobs(obs)
+            logalpha, logc = self.forwardstep(logalpha, logb)
+            loglik += logc
+            if window is not None:
+                window.append((logalpha, logb))
+            yield logalpha, loglik
+
+    def _smoothwindow(self, window):
+        # backward recursion over the window, from its last step
+        logbeta = np.zeros(self.nstates)
+        out = [None] * len(window)
+        for i in range(len(window) - 1, -1, -1):
+            logalpha, logb = window[i]
+            if i < len(window) - 1:
+                logbeta = self.backwardstep(logbeta, window[i + 1][1])
+            out[i] = _normalise(logalpha + logbeta)
+        return out
+
+    def forwardstep(self, logalpha, logemission):
+        """
+        One filtering step (batched over leading axes): returns the
+        normalised log p(h_t|v_1:t) and log p(v_t|v_1:t-1). logalpha is None
+        at the first step.
+        """
+        if logalpha is None:
+            la = self.logprior + logemission
+        else:
+            la = _logdot(logalpha, self.transition.T) + logemission
+        logc = _logsumexp(la)
+        return la - logc[..., None], logc
+
+    def backwardstep(self, logbeta, logemission):
+        """log beta_t from log beta_t+1 and log p(v_t+1|h_t+1), normalised."""
+        lb = _logdot(logbeta + logemission, self.transition)
+        return lb - _logsumexp(lb)[..., None]
+
+    def forwardbackward(self, obs, lengths=None):
+        """
+        Batched forward-backward over N sequences.
+            logalpha, logbeta, loggamma, loglik = model.forwardbackward(obs)
+
+        obs: N x T x K (or N x T) observations, missing states negative
+        lengths: the length of every sequence (the steps after it are
+        treated as missing)
+
+        Returns the normalised log filtered and smoothed posteriors
+        (N x T x S), the log backward messages and the log likelihood of
+        every sequence (N).
+        """
+        logb = self._batchemission(obs, lengths)
+        N, T, S = logb.shape
+        logalpha = np.empty((N, T, S))
+        logbeta = np.zeros((N, T, S))
+        loglik = np.zeros(N)
+        la = None
+        for t in range(T):
+            la, logc = self.forwardstep(la, logb[:, t])
+            logalpha[:, t] = la
+            loglik += logc
+        for t in range(T - 2, -1, -1):
+            logbeta[:, t] = self.backwardstep(logbeta[:, t + 1],
+                                              logb[:, t + 1])
+        loggamma = _normalise(logalpha + logbeta)
+        return logalpha, logbeta, loggamma, loglik
+
+    def viterbi(self, obs, lengths=None, checkpoint=None):
+        """
+        Most likely hidden paths of N sequences (max-product).
+            path, logprob = model.viterbi(obs)
+
+        obs: N x T x K (or N x T) observations, missing states negative
+        lengths: the length of every sequence (the path is padded with its
+        last state)
+        checkpoint: the max-messages are stored every checkpoint steps
+        (default ceil(sqrt(T))); the backpointers of one segment between
+        checkpoints are recomputed from its checkpoint during the
+        backtracking, so the memory is O((T/checkpoint + checkpoint) N S)
+        instead of O(T N S), for twice the computation.
+
+        Returns the N x T array of states and log p(path, obs) of every
+        sequence.
+        """
+        obs = self._checkobs(obs)
+        N, T = obs.shape[:2]
+        lengths = np.full(N, T) if lengths is None else \
+            np.asarray(lengths).reshape(N)
+        c = int(checkpoint or np.ceil(np.sqrt(T)))
+        delta = self.logprior + self.logobs(obs[:, 0])
+        offset = np.zeros(N)
+        stored = {0: delta}
+        for t in range(1, T):
+            delta, psi, m = self._maxstep(delta, obs[:, t], t < lengths)
+            offset += m
+            if t % c == 0:
+                stored[t] = delta
+        path = np.empty((N, T), dtype=int)
+        path[:, -1] = np.argmax(delta, axis=1)
+        logprob = np.max(delta, axis=1) + offset
+        rows = np.arange(N)
+        for start in range(((T - 1) // c) * c, -1, -c):
+            end = min(start + c, T - 1)
+            delta = stored.pop(start)
+            psis = []
+            for t in range(start + 1, end + 1):
+                delta, psi, m = self._maxstep(delta, obs[:, t], t < lengths)
+                psis.append(psi)
+            for t in range(end, start, -1):
+                path[:, t - 1] = psis[t - start - 1][rows, path[:, t]]
+        return path, logprob
+
+    def _maxstep(self, delta, obs, active):
+        # delta_t(j) = log p(v_t|j) + max_i delta_t-1(i) + log p(j|i)
+        scores = delta[:, None, :] + self.logtransition
+        psi = np.argmax(scores, axis=2)
+        new = np.take_along_axis(scores, psi[..., None], axis=2)[..., 0] + \
+            self.logobs(obs)
+        m = np.max(new, axis=1)
+        m = np.where(np.isfinite(m), m, 0.0)
+        new = new - m[:, None]
+        # finished sequences keep their message
+        active = np.asarray(active)
+        psi = np.where(active[:, None], psi, np.arange(self.nstates))
+        new = np.where(active[:, None], new, delta)
+        return new, psi, np.where(active, m, 0.0)
+
+    def _checkobs(self, obs):
+        obs = np.asarray(obs, dtype=int)
+        if obs.ndim == 2:
+            obs = obs[..., None]
+        if obs.ndim != 3 or obs.shape[2] != len(self.emission):
+            raise ValueError('observations must be N x T x %d'
+                             % len(self.emission))
+        return obs
+
+    def _batchemission(self, obs, lengths):
+        obs = self._checkobs(obs)
+        if lengths is not None:
+            pad = np.arange(obs.shape[1])[None, :] >= \
+                np.asarray(lengths).reshape(-1, 1)
+            obs = np.where(pad[..., None], -1, obs)
+        return self.logobs(obs)
+
+
+def _card(pots):
+    card = {}
+    for p in pots:
+        for v, n in zip(np.asarray(p.variables).reshape(-1),
+                        np.shape(p.table)):
+            card[int(v)] = int(n)
+    return card
+
+
+def _table(pots, variables, card):
+    # product of pots as an array with one axis per variable, in order
+    pot = multpots(pots)
+    pvars = [int(v) for v in np.asarray(pot.variables).reshape(-1)]
+    extra = [v for v in pvars if v not in variables]
+    if extra:
+        raise ValueError('variables %s not expected' % extra)
+    present = [v for v in variables if v in pvars]
+    table = np.transpose(np.asarray(pot.table, dtype=float),
+                         [pvars.index(v) for v in present])
+    shape = [card[v] if v in pvars else 1 for v in variables]
+    return np.broadcast_to(table.reshape(shape),
+                           [card[v] for v in variables]).copy()
+
+
+def _logsumexp(x):
+    m = np.max(x, axis=-1)
+    m = np.where(np.isfinite(m), m, 0.0)
+    with np.errstate(divide='ignore'):
+        return np.log(np.sum(np.exp(x - m[..., None]), axis=-1)) + m
+
+
+def _logdot(logx, matrix):
+    # log(exp(logx) @ matrix) without underflow
+    m = np.max(logx, axis=-1)
+    m = np.where(np.isfinite(m), m, 0.0)
+    with np.errstate(divide='ignore'):
+        return np.log(np.exp(logx - m[..., None]).dot(matrix)) + m[..., None]
+
+
+def _normalise(logx):
+    return logx - _logsumexp(logx)[..., None]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Entropy, conditional entropy, mutual information and KL divergence of
+potentials (in nats).
+
+Every function takes a Potential, a list of potentials with the same
+variables, or a stack: a Potential whose table has one more (leading) axis
+than it has variables, table[b] being the table of candidate b. For a
+single potential the result is a float, otherwise an array with one value
+per candidate. Tables need not be normalised, 0 log 0 is taken as 0.
+
+    H = entropy(pot, [x])
+    Hxy = condentropy(pot, [x], [y])
+    I = mutualinformation(stack, [x], [y])      # one value per candidate
+    D = kldivergence(p, q)
+"""
+import numpy as np
+from brml.chunked import sumout
+
+
+def entropy(pot, variables=None):
+    """Entropy H(variables) of the marginal (all variables if missing)."""
+    table, pvars, single = _stack(pot)
+    if variables is not None:
+        table, pvars = _marginal(table, pvars, variables)
+    return _result(_entropy(table), single)
+
+
+def condentropy(pot, x, y):
+    """Conditional entropy H(x|y) = H(x,y) - H(y)."""
+    table, pvars, single = _stack(pot)
+    x = np.asarray(x).reshape(-1)
+    y = np.asarray(y).reshape(-1)
+    joint, jvars = _marginal(table, pvars, np.union1d(x, y))
+    cond, cvars = _marginal(joint, jvars, y)
+    return _result(_entropy(joint) - _entropy(cond), single)
+
+
+def mutualinformation(pot, x, y):
+    """Mutual information I(x;y) = H(x) + H(y) - H(x,y)."""
+    table, pvars, single = _stack(pot)
+    x = np.asarray(x).reshape(-1)
+    y = np.asarray(y).reshape(-1)
+    joint, jvars = _marginal(table, pvars, np.union1d(x, y))
+    mi = _entropy(_marginal(joint, jvars, x)[0]) + \
+        _entropy(_marginal(joint, jvars, y)[0]) - _entropy(joint)
+    # rounding can make it slightly negative
+    return _result(np.maximum(mi, 0.0), single)
+
+
+def kldivergence(p, q):
+    """
+    KL divergence KL(p|q) = sum p log(p/q) of potentials on the same
+    variables (in any order). Either may be a stack, a single potential is
+    compared with every candidate of the other. It is infinite where q is
+    zero and p is not.
+    """
+    ptable, pvars, psingle = _stack(p)
+    qtable, qvars, qsingle = _stack(q)
+    if sorted(pvars) != sorted(qvars):
+        raise ValueError('p and q must have the same variables')
+    qtable = np.transpose(qtable, [0] + [1 + qvars.index(v) for v in pvars])
+    ptable = _normalise(ptable)
+    qtable = _normalise(qtable)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(ptable > 0,
+                         ptable * (np.log(ptable) - np.log(qtable)), 0.0)
+    kl = np.sum(terms.reshape(terms.shape[0], -1), axis=1)
+    return _result(kl, psingle and qsingle)
+
+
+def _stack(pot):
+    # (B,) + card table, list of variables and whether it was one potential
+    if isinstance(pot, (list, tuple)):
+        pvars = [int(v) for v in np.asarray(pot[0].variables).reshape(-1)]
+        tables = []
+        for p in pot:
+            vs = [int(v) for v in np.asarray(p.variables).reshape(-1)]
+            tables.append(np.transpose(np.asarray(p.table, dtype=float),
+                                       [vs.index(v) for v in pvars]))
+        return np.stack(tables), pvars, False
+    pvars = [int(v) for v in np.asarray(pot.variables).reshape(-1)]
+    table = np.asarray(pot.table, dtype=float)
+    if table.ndim == len(pvars):
+        return table[None], pvars, True
+    if table.ndim == len(pvars) + 1:
+        return table, pvars, False
+    raise ValueError('table has %d axes for %d variables'
+                     % (table.ndim, len(pvars)))
+
+
+def _marginal(table, pvars, variables):
+    variables = [int(v) for v in np.asarray(variables).reshape(-1)]
+    missing = [v for v in variables if v not in pvars]
+    if missing:
+        raise ValueError('variables %s are not in the potential' % missing)
+    axes = [1 + i for i, v in enumerate(pvars) if v not in variables]
+    return sumout(table, axes), [v for v in pvars if v in variables]
+
+
+def _normalise(table):
+    total = np.sum(table.reshape(table.shape[0], -1), axis=1)
+    total = np.where(total > 0, total, 1.0)
+    return table / total.reshape((-1,) + (1,) * (table.ndim - 1))
+
+
+def _entropy(table):
+    table = _normalise(table).reshape(table.shape[0], -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(table > 0, table * np.log(table), 0.0)
+    return -np.sum(terms, axis=1)
+
+
+def _result(values, single):
+    return float(values[0]) if single else values
@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import contextlib
+import numpy as np
+from brml.potential import Potential
+from brml.chunked import sumout
+
+
+class JunctionTree:
+    """
+    Junction tree of a set of potentials with incremental evidence.
+        jt = JunctionTree(pot)
+        jt.setevidence(alarm, yes)
+        jt.marginal(burglar)          # p(burglar|alarm=yes)
+        jt.setevidence(radio, yes)
+        jt.retract(alarm)
+
+    The messages between cliques are computed on demand and cached. Every
+    variable has a home clique in which its evidence is entered; changing
+    the evidence on a variable only discards the cached messages that flow
+    away from its home clique, so the next query recomputes the messages
+    on the path from that clique to the queried one and reuses the rest.
+    Messages are normalised and their log scale is kept, which gives the
+    probability of the evidence as well.
+
+    Attributes
+    ----------
+
+    cliques: list of np.ndarray
+        The (sorted) variables of every clique.
+
+    neighbours: list of list of int
+        The edges of the tree.
+
+    evidence: dict
+        Variable -> observed state (or likelihood vector).
+    """
+    def __init__(self, pot, order=None):
+        """
+        pot: list of potentials, their product is the distribution
+        order: elimination order used to triangulate the graph (min-fill
+        if missing)
+        """
+        self.pot = [p for p in pot if np.asarray(p.variables).size]
+        self.card = {}
+        for p in self.pot:
+            for v, n in zip(np.asarray(p.variables).reshape(-1),
+                            np.shape(p.table)):
+                self.card[int(v)] = int(n)
+        self.variables = np.array(sorted(self.card))
+        self.cliques = triangulate(self.pot, self.variables, order)
+        self.neighbours = spanningtree(self.cliques, self.variables)
+
+        C = len(self.cliques)
+        member = cliquemembership(self.cliques, self.variables)
+        self.home = {}
+        for i, v in enumerate(self.variables):
+            cand = np.nonzero(member[:, i])[0]
+            self.home[int(v)] = int(cand[np.argmin([self.cliques[c].size
+                                                    for c in cand])])
+        self.phi = [ones(c, self.card) for c in self.cliques]
+        for p in self.pot:
+            idx = np.searchsorted(self.variables,
+                                  np.asarray(p.variables).reshape(-1))
+            cand = np.nonzero(member[:, idx].all(axis=1))[0]
+            c = cand[np.argmin([self.cliques[k].size for k in cand])]
+            self.phi[c] = self.phi[c] * p
+
+        self.evidence = {}
+        self._messages = {}
+        # the directed edges pointing away from every clique
+        self._away = [awayedges(self.neighbours, c) for c in range(C)]
+
+    def setevidence(self, variable, state):
+        """
+        Set the evidence on variable to state, an integer state or a
+        likelihood vector over the states of variable.
+        """
+        variable = int(variable)
+        if variable not in self.card:
+            raise ValueError('unknown variable %d' % variable)
+        self.evidence[variable] = state
+        self._invalidate(variable)
+
+    def retract(self, variable):
+        """Remove the evidence on variable."""
+        variable = int(variable)
+        if self.evidence.pop(variable, None) is not None:
+            self._invalidate(variable)
+
+    def marginal(self, variables):
+        """
+        Return the potential p(variables|evidence). The variables have to
+        be in one clique.
+        """
+        variables = np.unique(np.asarray(variables).reshape(-1))
+        c = self.clique(variables)
+        if c is None:
+            raise ValueError('variables are not in one clique')
+        belief, logscale = self.belief(c)
+        other = np.nonzero(~np.isin(belief.variables, variables))[0]
+        newpot = Potential()
+        newpot.variables = variables
+        newpot.table = sumout(belief.table, other)
+        newpot.card = np.array(np.shape(newpot.table))
+        total = np.sum(newpot.table)
+        if total > 0:
+            newpot.table = newpot.table / total
+        return newpot
+
+    def marginals(self, variables=None):
+        """
+        Dict of the potentials p(v|evidence) of the variables (all if
+        missing), from one belief per home clique.
+        """
+        if variables is None:
+            variables = self.variables
+        variables = [int(v) for v in np.asarray(variables).reshape(-1)]
+        byclique = {}
+        for v in variables:
+            byclique.setdefault(self.home[v], []).append(v)
+        out = {}
+        for c, vs in byclique.items():
+            belief, logscale = self.belief(c)
+            total = np.sum(belief.table)
+            for v in vs:
+                newpot = Potential()
+                newpot.variables = np.array([v])
+                i = list(belief.variables).index(v)
+                newpot.table = sumout(belief.table,
+                                      [j for j in range(belief.table.ndim)
+                                       if j != i])
+                if total > 0:
+                    newpot.table = newpot.table / total
+                newpot.card = np.array([self.card[v]])
+                out[v] = newpot
+        return out
+
+    @contextlib.contextmanager
+    def suppose(self, variable, state):
+        """
+        Context in which variable is observed in state. The evidence and
+        the cached messages are restored on exit, so the messages computed
+        without it are not recomputed.
+            with jt.suppose(test, positive):
+                jt.marginal(disease)
+        """
+        variable = int(variable)
+        messages = dict(self._messages)
+        old = self.evidence.get(variable)
+        self.setevidence(variable, state)
+        try:
+            yield self
+        finally:
+            if old is None:
+                del self.evidence[variable]
+            else:
+                self.evidence[variable] = old
+            self._messages = messages
+
+    def logprobevidence(self):
+        """Log of the probability of the evidence (log normaliser)."""
+        total = 0.0
+        for root in self.roots():
+            belief, logscale = self.belief(root)
+            total += np.log(np.sum(belief.table)) + logscale
+        return total
+
+    def clique(self, variables):
+        """Smallest clique containing all variables, or None."""
+        best = None
+        for c, vs in enumerate(self.cliques):
+            if np.isin(variables, vs).all() and \
+                    (best is None or vs.size < self.cliques[best].size):
+                best = c
+        return best
+
+    def roots(self):
+        """One clique of every connected component of the tree."""
+        seen = set()
+        roots = []
+        for c in range(len(self.cliques)):
+            if c in seen:
+                continue
+            roots.append(c)
+            stack = [c]
+            while stack:
+                i = stack.pop()
+                if i not in seen:
+                    seen.add(i)
+                    stack.extend(self.neighbours[i])
+        return roots
+
+    def belief(self, c):
+        """
+        Unnormalised belief of clique c and its log scale: the clique
+        potential times its evidence and all incoming messages.
+        """
+        pot, logscale = self._local(c)
+        for k in self.neighbours[c]:
+            m, s = self.message(k, c)
+            pot = pot * m
+            logscale += s
+        return pot, logscale
+
+    def message(self, i, j):
+        """Cached (normalised) message from clique i to clique j."""
+        key = (i, j)
+        if key not in self._messages:
+            pot, logscale = self._local(i)
+            for k in self.neighbours[i]:
+                if k != j:
+                    m, s = self.message(k, i)
+                    pot = pot * m
+                    logscale += s
+            sep = np.intersect1d(self.cliques[i], self.cliques[j])
+            other = np.nonzero(~np.isin(pot.variables, sep))[0]
+            m = Potential()
+            m.variables = np.asarray(pot.variables)[
+                np.isin(pot.variables, sep)]
+            m.table = sumout(pot.table, other)
+            m.card = np.array(np.shape(m.table))
+            total = np.sum(m.table)
+            if total > 0:
+                m.table = m.table / total
+                logscale += np.log(total)
+            else:
+                logscale = -np.inf
+            self._messages[key] = (m, logscale)
+        return self._messages[key]
+
+    def _local(self, c):
+        pot = self.phi[c]
+        for v, state in self.evidence.items():
+            if self.home[v] == c:
+                pot = pot * indicator(v, self.card[v], state)
+        return pot, 0.0
+
+    def _invalidate(self, variable):
+        for edge in self._away[self.home[variable]]:
+            self._messages.pop(edge, None)
+
+
+def indicator(variable, card, state):
+    """Potential on variable: one-hot at state, or a likelihood vector."""
+    pot = Potential()
+    pot.variables = np.array([variable])
+    pot.card = np.array([card])
+    if np.ndim(state) == 0:
+        pot.table = np.zeros(card)
+        pot.table[int(state)] = 1.0
+    else:
+        pot.table = np.asarray(state, dtype=float).reshape(card)
+    return pot
+
+
+def ones(variables, card):
+    pot = Potential()
+    pot.variables = np.asarray(variables)
+    pot.card = np.array([card[int(v)] for v in pot.variables], dtype=int)
+    pot.table = np.ones(tuple(pot.card))
+    return pot
+
+
+def triangulate(pot, variables, order=None):
+    """
+    Cliques of the triangulated interaction graph of pot, found by variable
+    elimination along order (greedy min-fill if missing).
+    """
+    if order is None:
+        order = minfillorder(pot)
+    index = dict((int(v), i) for i, v in enumerate(variables))
+    adj = interactiongraph(pot, index)
+    cliques = []
+    for v in order:
+        v = index[int(v)]
+        nb = adj[v]
+        cliques.append(frozenset(nb | {v}))
+        eliminate(adj, v)
+    maximal = []
+    for c in sorted(set(cliques), key=len, reverse=True):
+        if not any(c <= m for m in maximal):
+            maximal.append(c)
+    return [np.array(sorted(variables[i] for i in c)) for c in maximal]
+
+
+def minfillorder(pot):
+    """
+    Greedy min-fill elimination order of the variables of pot (ties broken
+    by the number of neighbours, then the variable).
+    """
+    variables = sorted(set(int(v) for p in pot
+                           for v in np.asarray(p.variables).reshape(-1)))
+    index = dict((v, i) for i, v in enumerate(variables))
+    adj = interactiongraph(pot, index)
+    left = set(range(len(variables)))
+    order = []
+    while left:
+        v = min(left, key=lambda u: (fillin(adj, u), len(adj[u]), u))
+        eliminate(adj, v)
+        left.discard(v)
+        order.append(variables[v])
+    return order
+
+
+def interactiongraph(pot, index):
+    adj = [set() for i in range(len(index))]
+    for p in pot:
+        vs = [index[int(v)] for v in np.asarray(p.variables).reshape(-1)]
+        for a in vs:
+            adj[a].update(b for b in vs if b != a)
+    return adj
+
+
+def eliminate(adj, v):
+    # connect the neighbours of v and remove it
+    nb = adj[v]
+    for a in nb:
+        adj[a].update(b for b in nb if b != a)
+        adj[a].discard(v)
+    adj[v] = set()
+
+
+def fillin(adj, v):
+    nb = list(adj[v])
+    return sum(1 for i, a in enumerate(nb) for b in nb[i + 1:]
+               if b not in adj[a])
+
+
+def cliquemembership(cliques, variables):
+    member = np.zeros((len(cliques), len(variables)), dtype=bool)
+    for c, vs in enumerate(cliques):
+        member[c, np.searchsorted(variables, vs)] = True
+    return member
+
+
+def spanningtree(cliques, variables):
+    """
+    Maximum weight spanning tree of the cliques, the weight of an edge
+    being the size of the separator (Prim's algorithm).
+    """
+    C = len(cliques)
+    member = cliquemembership(cliques, variables).astype(int)
+    weight = member.dot(member.T)
+    neighbours = [[] for c in range(C)]
+    if C == 0:
+        return neighbours
+    intree = np.zeros(C, dtype=bool)
+    intree[0] = True
+    best = weight[0].astype(float)
+    link = np.zeros(C, dtype=int)
+    for step in range(C - 1):
+        cand = np.where(intree, -np.inf, best)
+        j = int(np.argmax(cand))
+        i = int(link[j])
+        neighbours[i].append(j)
+        neighbours[j].append(i)
+        intree[j] = True
+        better = weight[j] > best
+        best = np.where(better, weight[j], best)
+        link = np.where(better, j, link)
+    return neighbours
+
+
+def awayedges(neighbours, root):
+    """Directed edges (i, j) with i on the path from root to j."""
+    edges = []
+    stack = [(root, None)]
+    while stack:
+        i, parent = stack.pop()
+        for j in neighbours[i]:
+            if j != parent:
+                edges.append((i, j))
+                stack.append((j, i))
+    return edges
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Lazy potential expressions.
+
+The functions of this module mirror multpots, setpot and condpot but only
+build an expression graph; nothing is computed until evaluate() is called:
+
+    from brml import lazy
+    expr = lazy.condpot(lazy.setpot(lazy.multpots(pot), [alarm], [yes]),
+                        [burglar])
+    posterior = expr.evaluate()          # a brml.potential.Potential
+
+Expressions can also be combined with *, .setpot(), .sumout() and
+.condpot(). On evaluation the whole graph is flattened into one list of
+tables: evidence is applied by indexing the input tables, the variables
+summed out inside a sub-expression are renamed so that they stay distinct
+from the same variables elsewhere, and the products and sums are done by a
+single einsum contraction with an optimised path (variable elimination by
+pairwise contractions when there are too many indices for one einsum). The
+joint table of a product is never formed unless it is the result.
+"""
+import itertools
+import numpy as np
+from brml.potential import Potential
+
+
+class Expression:
+    """Node of a lazy expression graph."""
+    def __mul__(self, other):
+        return Product([self, lazy(other)])
+
+    def setpot(self, evvariables, evstates):
+        return Evidence(self, evvariables, evstates)
+
+    def sumout(self, variables):
+        return Sum(self, variables)
+
+    def marginal(self, variables):
+        """Sum out all variables except the given ones."""
+        keep = set(int(v) for v in np.asarray(variables).reshape(-1))
+        return Sum(self, [v for v in self.variables if v not in keep])
+
+    def condpot(self, variables=None):
+        """Normalised marginal (all variables if missing)."""
+        expr = self if variables is None else self.marginal(variables)
+        return Normalise(expr)
+
+    def evaluate(self):
+        """Contract the expression into a Potential."""
+        operands = self.flatten(itertools.count())
+        output = [('v', v) for v in self.variables]
+        newpot = Potential()
+        newpot.variables = np.array(self.variables, dtype=int)
+        newpot.card = np.array([self.card[v] for v in self.variables],
+                               dtype=int)
+        newpot.table = contract(operands, output)
+        return newpot
+
+
+class Leaf(Expression):
+    def __init__(self, pot):
+        self.pot = pot
+        vs = [int(v) for v in np.asarray(pot.variables).reshape(-1)]
+        self.card = dict(zip(vs, np.shape(pot.table)))
+        self.variables = sorted(self.card)
+
+    def flatten(self, counter):
+        vs = [int(v) for v in np.asarray(self.pot.variables).reshape(-1)]
+        return [(np.asarray(self.pot.table), [('v', v) for v in vs])]
+
+
+class Product(Expression):
+    def __init__(self, factors):
+        self.factors = []
+        for f in factors:
+            # keep products flat
+            self.factors.extend(f.factors if isinstance(f, Product) else [f])
+        self.card = {}
+        for f in self.factors:
+            self.card.update(f.card)
+        self.variables = sorted(self.card)
+
+    def flatten(self, counter):
+        return [op for f in self.factors for op in f.flatten(counter)]
+
+
+class Evidence(Expression):
+    def __init__(self, expr, evvariables, evstates):
+        self.expr = expr
+        evvariables = np.asarray(evvariables, dtype=int).reshape(-1)
+        evstates = np.asarray(evstates, dtype=int).reshape(-1)
+        self.evidence = dict((int(v), int(s))
+                             for v, s in zip(evvariables, evstates)
+                             if int(v) in expr.card)
+        self.card = dict((v, n) for v, n in expr.card.items()
+                         if v not in self.evidence)
+        self.variables = sorted(self.card)
+
+    def flatten(self, counter):
+        operands = []
+        for table, labels in self.expr.flatten(counter):
+            index = tuple(self.evidence[l[1]]
+                          if l[0] == 'v' and l[1] in self.evidence
+                          else slice(None) for l in labels)
+            operands.append((table[index],
+                             [l for l in labels
+                              if not (l[0] == 'v' and l[1] in self.evidence)]))
+        return operands
+
+
+class Sum(Expression):
+    def __init__(self, expr, variables):
+        self.expr = expr
+        self.summed = set(int(v) for v in np.asarray(variables).reshape(-1)
+                          if int(v) in expr.card)
+        self.card = dict((v, n) for v, n in expr.card.items()
+                         if v not in self.summed)
+        self.variables = sorted(self.card)
+
+    def flatten(self, counter):
+        # the summed variables become indices of their own
+        rename = dict((('v', v), ('b', next(counter))) for v in self.summed)
+        return [(table, [rename.get(l, l) for l in labels])
+                for table, labels in self.expr.flatten(counter)]
+
+
+class Normalise(Expression):
+    def __init__(self, expr):
+        self.expr = expr
+        self.card = expr.card
+        self.variables = expr.variables
+
+    def flatten(self, counter):
+        operands = self.expr.flatten(counter)
+        total = contract(operands, [])
+        return operands + [(np.asarray(1.0 / total if total > 0 else 1.0),
+                            [])]
+
+
+def lazy(pot):
+    """Expression of a Potential, or of the product of a list of them."""
+    if isinstance(pot, Expression):
+        return pot
+    if isinstance(pot, (list, tuple)):
+        return Product([lazy(p) for p in pot])
+    return Leaf(pot)
+
+
+def multpots(pots):
+    return Product([lazy(p) for p in pots])
+
+
+def setpot(pot, evvariables, evstates):
+    return lazy(pot).setpot(evvariables, evstates)
+
+
+def condpot(pot, variables=None):
+    return lazy(pot).condpot(variables)
+
+
+def sumpot(pot, variables):
+    return lazy(pot).sumout(variables)
+
+
+def contract(operands, output):
+    """
+    Sum of the product of the operands (table, labels) over every label not
+    in output; the result has one axis per label of output.
+    """
+    labels = {}
+    for table, ls in operands:
+        for l in ls:
+            labels.setdefault(l, len(labels))
+    for l in output:
+        labels.setdefault(l, len(labels))
+    if len(labels) <= 52:
+        args = []
+        for table, ls in operands:
+            args += [table, [labels[l] for l in ls]]
+        args.append([labels[l] for l in output])
+        return np.einsum(*args, optimize='greedy')
+    return _eliminate(operands, output)
+
+
+def _eliminate(operands, output):
+    # pairwise variable elimination, smallest intermediate first
+    operands = list(operands)
+    keep = set(output)
+    left = set(l for t, ls in operands for l in ls) - keep
+    while left:
+        def cost(l):
+            vs = set(m for t, ls in operands if l in ls for m in ls)
+            return len(vs)
+        l = min(left, key=cost)
+        bucket = [op for op in operands if l in op[1]]
+        operands = [op for op in operands if l not in op[1]]
+        out = sorted(set(m for t, ls in bucket for m in ls) - {l},
+                     key=repr)
+        operands.append((contract(bucket, out), out))
+        left.discard(l)
+    return contract(operands, output)
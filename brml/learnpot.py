@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+from brml.potential import Potential
+from brml.dag import dag
+from brml.count import linearindex, datachunks
+
+
+def learnpot(pot, data, nstates=None, method='ML', ess=1.0):
+    """
+    Learn the conditional probability tables of a Belief Network from data.
+        newpot = learnpot(pot, data, <nstates>, <method>, <ess>)
+
+    The structure of the network is taken from dag(pot): pot[i] is the
+    distribution p(i|pa(i)). Every row of data is counted once for all the
+    families of the network, so data given as an iterator of chunks is only
+    read once.
+
+    Parameters
+    ----------
+
+    pot: list of brml.potential.Potential
+        The network whose structure is used; only the variables (and card,
+        if nstates is missing) fields are read, the tables may be empty.
+
+    data: array_like or iterator of array_like
+        Integer data matrix (rows are observations, columns are variables,
+        states start from 0), or an iterator of such chunks.
+
+    nstates: array_like (optional)
+        Number of states of every variable. If missing, it is taken from
+        the card fields of pot.
+
+    method: str (optional)
+        'ML' for maximum likelihood, 'BDeu' for the posterior mean under a
+        BDeu Dirichlet prior.
+
+    ess: float (optional)
+        Equivalent sample size of the BDeu prior.
+
+    Returns
+    -------
+
+    newpot: list of brml.potential.Potential
+        newpot[i] has variables [i, pa(i)] (parents sorted) and a table
+        normalised over its first axis.
+    """
+    if method not in ('ML', 'BDeu'):
+        raise ValueError('method should be ML or BDeu')
+    A = dag(pot)
+    N = A.shape[0]
+    if nstates is None:
+        nstates = potcard(pot, N)
+    nstates = np.asarray(nstates, dtype=int)
+
+    families = [np.append(i, np.nonzero(A[:, i])[0]) for i in range(N)]
+    counts = familycount(data, nstates, families)
+
+    newpot = []
+    for family, table in zip(families, counts):
+        newpot.append(cpt(family, nstates, table, method, ess))
+    return newpot
+
+
+def familycount(data, nstates, families):
+    """
+    Count the joint states of every family in one pass over the data chunks.
+    Returns a list of tables, counts[f] of shape nstates[families[f]].
+    """
+    nstates = np.asarray(nstates, dtype=int)
+    sizes = [int(np.prod(nstates[f])) for f in families]
+    counts = [np.zeros(s, dtype=int) for s in sizes]
+    for chunk in datachunks(data):
+        for f, family in enumerate(families):
+            counts[f] += np.bincount(linearindex(chunk, nstates, family),
+                                     minlength=sizes[f])
+    return [c.reshape(nstates[f]) for c, f in zip(counts, families)]
+
+
+def cpt(family, nstates, counts, method='ML', ess=1.0):
+    """
+    Return the potential p(family[0]|family[1:]) estimated from the family
+    counts. Parent states that never occur get a uniform distribution under
+    maximum likelihood.
+    """
+    family = np.asarray(family, dtype=int)
+    counts = np.asarray(counts, dtype=float)
+    if method == 'BDeu':
+        counts = counts + float(ess) / counts.size
+    norm = counts.sum(axis=0, keepdims=True)
+    table = np.where(norm > 0, counts / np.where(norm > 0, norm, 1),
+                     1.0 / counts.shape[0])
+
+    newpot = Potential()
+    newpot.variables = family
+    newpot.card = np.asarray(nstates, dtype=int)[family]
+    newpot.table = table
+    return newpot
+
+
+def potcard(pot, N):
+    """Return the number of states of variables 0..N-1 from the pot cards."""
+    nstates = np.zeros(N, dtype=int)
+    for p in pot:
+        card = np.asarray(p.card).reshape(-1)
+        if card.size != np.asarray(p.variables).size:
+            raise ValueError('card of every potential is needed when '
+                             'nstates is missing')
+        nstates[np.asarray(p.variables, dtype=int)] = card
+    if (nstates == 0).any():
+        raise ValueError('number of states missing for some variables')
+    return nstates
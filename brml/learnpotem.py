@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from brml.dag import dag
+from brml.count import datachunks, compressdata
+from brml.learnpot import cpt, potcard
+
+
+def learnpotem(pot, data, nstates=None, maxit=100, tol=1e-6, method='ML',
+               ess=1.0, warmstart=True, seed=None, workers=1):
+    """
+    Learn the conditional probability tables of a Belief Network from data
+    with missing entries using Expectation Maximisation.
+        newpot, loglik = learnpotem(pot, data, <nstates>, <maxit>, <tol>, ...)
+
+    Identical rows are merged and the remaining rows are grouped by their
+    missingness pattern. The E-step computes the posterior over the missing
+    variables of all rows of a pattern in one batched einsum, so setpot and
+    condpot are never called per row. Patterns can be processed in parallel
+    by a pool of worker processes.
+
+    Parameters
+    ----------
+
+    pot: list of brml.potential.Potential
+        The network, pot[i] is p(i|pa(i)). If warmstart is True and the
+        tables are filled in, they are used as the initial parameters.
+
+    data: array_like or iterator of array_like
+        Integer data matrix (rows are observations, columns are variables,
+        states start from 0); missing entries are coded as negative numbers.
+        An iterator of chunks is read once and stored in compressed form
+        (one row per distinct observation).
+
+    nstates: array_like (optional)
+        Number of states of every variable, taken from the card fields of
+        pot if missing.
+
+    maxit: int (optional)
+        Maximum number of EM iterations, at least 1.
+
+    tol: float (optional)
+        Stop when the relative change of the log likelihood is below tol.
+
+    method, ess: (optional)
+        The M-step estimator, see brml.learnpot.learnpot.
+
+    warmstart: bool (optional)
+        Start from the tables of pot. If False (or a table is empty) the
+        tables are initialised at random.
+
+    seed: int (optional)
+        Seed of the random initialisation.
+
+    workers: int (optional)
+        Number of worker processes for the E-step; 1 runs in this process.
+
+    Returns
+    -------
+
+    newpot: list of brml.potential.Potential
+        newpot[i] has variables [i, pa(i)] (parents sorted).
+
+    loglik: list of float
+        The log likelihood of the data before every M-step.
+    """
+    if maxit < 1:
+        raise ValueError('maxit should be at least 1')
+    A = dag(pot)
+    N = A.shape[0]
+    if nstates is None:
+        nstates = potcard(pot, N)
+    nstates = np.asarray(nstates, dtype=int)
+    families = [np.append(i, np.nonzero(A[:, i])[0]) for i in range(N)]
+
+    patterns = missingpatterns(data, N)
+    tables = inittables(pot, families, nstates, warmstart, seed)
+
+    executor = None
+    if workers > 1 and len(patterns) > 1:
+        executor = ProcessPoolExecutor(workers, initializer=_initworker,
+                                       initargs=(patterns, families, nstates))
+    loglik = []
+    try:
+        for it in range(maxit):
+            if executor is None:
+                results = [estep(p, families, nstates, tables)
+                           for p in patterns]
+            else:
+                results = list(executor.map(_workerestep,
+                                            range(len(patterns)),
+                                            [tables] * len(patterns)))
+            counts = [sum(r[0][f] for r in results)
+                      for f in range(len(families))]
+            loglik.append(sum(r[1] for r in results))
+            newpot = [cpt(f, nstates, c, method, ess)
+                      for f, c in zip(families, counts)]
+            tables = [p.table for p in newpot]
+            if it > 0 and abs(loglik[-1] - loglik[-2]) <= \
+                    tol * abs(loglik[-2]):
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return newpot, loglik
+
+
+def missingpatterns(data, N):
+    """
+    Merge identical rows of data and group them by missingness pattern.
+    Returns a list of (observed, missing, rows, weights): the observed and
+    missing variables of the pattern, the distinct rows with that pattern
+    and the number of times each row occurs.
+    """
+    rows, weights = compressdata((np.where(chunk < 0, -1, chunk)
+                                  for chunk in datachunks(data)), N)
+
+    masks, pattern = np.unique(rows < 0, axis=0, return_inverse=True)
+    pattern = pattern.reshape(-1)
+    patterns = []
+    for m, mask in enumerate(masks):
+        sel = pattern == m
+        patterns.append((np.nonzero(~mask)[0], np.nonzero(mask)[0],
+                         rows[sel], weights[sel]))
+    return patterns
+
+
+def estep(pattern, families, nstates, tables):
+    """
+    Batched E-step for all rows that share one missingness pattern.
+    Returns the expected family counts and the log likelihood of the rows.
+    """
+    observed, missing, rows, weights = pattern
+    k = rows.shape[0]
+    axis = dict((v, i + 1) for i, v in enumerate(missing))  # 0 is the row
+
+    # p(observed, missing) for every row: product of the CPTs with the
+    # observed states indexed in, as a k x nstates[missing] table
+    operands = [np.ones(k), [0]]
+    for family, table in zip(families, tables):
+        ismiss = np.isin(family, missing)
+        order = np.append(np.nonzero(~ismiss)[0], np.nonzero(ismiss)[0])
+        table = np.transpose(table, order)
+        obs = family[order][:(~ismiss).sum()]
+        if obs.size:
+            table = table[tuple(rows[:, obs].T)]
+            subs = [0]
+        else:
+            subs = []
+        operands += [table, subs + [axis[v] for v in family[ismiss]]]
+    joint = np.einsum(*(operands + [[0] + [axis[v] for v in missing]]))
+
+    lik = joint.reshape(k, -1).sum(axis=1)
+    post = joint * (weights / np.where(lik > 0, lik, 1)).reshape(
+        (k,) + (1,) * missing.size)
+    loglik = float(np.sum(weights * np.log(np.where(lik > 0, lik, 1e-300))))
+
+    counts = []
+    for family in families:
+        ismiss = np.isin(family, missing)
+        fmiss = family[ismiss]
+        fobs = family[~ismiss]
+        pf = np.einsum(post, [0] + [axis[v] for v in missing],
+                       [0] + [axis[v] for v in fmiss]).reshape(k, -1)
+        # scatter the row posteriors into the (observed, missing) layout
+        nobs = int(np.prod(nstates[fobs]))
+        nmis = pf.shape[1]
+        if fobs.size:
+            L = np.ravel_multi_index(tuple(rows[:, fobs].T),
+                                     tuple(nstates[fobs]))
+        else:
+            L = np.zeros(k, dtype=np.intp)
+        idx = (L[:, None] * nmis + np.arange(nmis)).reshape(-1)
+        c = np.bincount(idx, weights=pf.reshape(-1), minlength=nobs * nmis)
+        c = c.reshape(tuple(nstates[fobs]) + tuple(nstates[fmiss]))
+        # back to the family order [i, pa(i)]
+        order = np.append(np.nonzero(~ismiss)[0], np.nonzero(ismiss)[0])
+        counts.append(np.transpose(c, np.argsort(order)))
+    return counts, loglik
+
+
+def inittables(pot, families, nstates, warmstart=True, seed=None):
+    """
+    Initial CPT tables in family order: the tables of pot (reordered to
+    [i, pa(i)]) for a warm start, random normalised tables otherwise.
+    """
+    rng = np.random.RandomState(seed)
+    byvariable = {}
+    for p in pot:
+        variables = np.asarray(p.variables).reshape(-1)
+        if variables.size:
+            byvariable[int(variables[0])] = p
+
+    tables = []
+    for family in families:
+        dims = tuple(nstates[family])
+        p = byvariable.get(int(family[0]))
+        table = None
+        if warmstart and p is not None and np.size(p.table) == np.prod(dims):
+            old = list(np.asarray(p.variables).reshape(-1))
+            if sorted(old) == sorted(family):
+                table = np.transpose(np.asarray(p.table, dtype=float),
+                                     [old.index(v) for v in family])
+                table = table.reshape(dims)
+        if table is None:
+            table = rng.uniform(0.5, 1.5, dims)
+            table = table / table.sum(axis=0, keepdims=True)
+        tables.append(table)
+    return tables
+
+
+_worker = {}
+
+
+def _initworker(patterns, families, nstates):
+    _worker['patterns'] = patterns
+    _worker['families'] = families
+    _worker['nstates'] = nstates
+
+
+def _workerestep(p, tables):
+    return estep(_worker['patterns'][p], _worker['families'],
+                 _worker['nstates'], tables)
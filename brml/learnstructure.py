@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from brml.count import compressdata
+
+_lgamma = np.vectorize(math.lgamma, otypes=[float])
+
+
+def learnstructure(data, nstates, score='BIC', ess=1.0, maxparents=None,
+                   maxit=1000, A=None, workers=1):
+    """
+    Learn the structure of a Belief Network by greedy hill climbing.
+        A, total = learnstructure(data, nstates, <score>, <ess>, ...)
+
+    Every step tries all edge additions, deletions and reversals that keep
+    the graph acyclic and applies the one that increases the score most.
+    Since the score decomposes over families, a move is evaluated by the
+    change of at most two family scores. Family scores and the contingency
+    counts they are computed from are cached, so a family is counted and
+    scored only once during the search; the families that are not yet in
+    the cache can be scored in parallel by a pool of worker processes.
+
+    Parameters
+    ----------
+
+    data: array_like or iterator of array_like
+        Integer data matrix (rows are observations, columns are variables,
+        states start from 0), or an iterator of such chunks.
+
+    nstates: array_like
+        Number of states of every variable.
+
+    score: str (optional)
+        'BIC' or 'BDeu'.
+
+    ess: float (optional)
+        Equivalent sample size of the BDeu score.
+
+    maxparents: int (optional)
+        Maximum number of parents of a variable; unbounded if missing.
+
+    maxit: int (optional)
+        Maximum number of moves.
+
+    A: np.ndarray (optional)
+        Adjacency matrix to start from (as returned by dag); the empty
+        graph if missing.
+
+    workers: int (optional)
+        Number of worker processes used to score new families.
+
+    Returns
+    -------
+
+    A: np.ndarray
+        The adjacency matrix of the learned network, A[i, j] = 1 if i is a
+        parent of j (same format as dag).
+
+    total: float
+        The score of the learned network.
+    """
+    if score not in ('BIC', 'BDeu'):
+        raise ValueError('score should be BIC or BDeu')
+    nstates = np.asarray(nstates, dtype=int)
+    N = nstates.size
+    if maxparents is None:
+        maxparents = N - 1
+    rows, weights = compressdata(data, N)
+
+    if A is None:
+        A = np.zeros((N, N))
+    A = (np.asarray(A) != 0).astype(float)
+    np.fill_diagonal(A, 0)
+
+    scorer = FamilyScorer(rows, weights, nstates, score, ess)
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers, initializer=_initworker,
+                                       initargs=(rows, weights, nstates,
+                                                 score, ess))
+    try:
+        for it in range(maxit):
+            moves = candidatemoves(A, maxparents)
+            needed = set(family(A, v) for v in range(N))
+            for move in moves:
+                needed.update(move[2])
+            scorer.update(needed, executor, workers)
+
+            best, bestdelta = None, 1e-10
+            for move in moves:
+                delta = sum(scorer.scores[new] - scorer.scores[old]
+                            for old, new in zip(move[1], move[2]))
+                if delta > bestdelta:
+                    best, bestdelta = move, delta
+            if best is None:
+                break
+            kind, (u, v) = best[0]
+            if kind == 'add':
+                A[u, v] = 1
+            elif kind == 'delete':
+                A[u, v] = 0
+            else:
+                A[u, v] = 0
+                A[v, u] = 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    families = [family(A, v) for v in range(N)]
+    scorer.update(families)
+    return A, float(sum(scorer.scores[f] for f in families))
+
+
+def family(A, v, add=None, remove=None):
+    """Return the cache key (v, sorted parents) of the family of v in A."""
+    pa = set(np.nonzero(A[:, v])[0].tolist())
+    if add is not None:
+        pa.add(add)
+    if remove is not None:
+        pa.discard(remove)
+    return (v, tuple(sorted(pa)))
+
+
+def candidatemoves(A, maxparents):
+    """
+    Return all legal moves as (('add'|'delete'|'reverse', (u, v)), old, new)
+    where old and new are the family keys whose scores the move replaces.
+    """
+    N = A.shape[0]
+    reach = reachability(A)
+    npa = A.sum(axis=0)
+    moves = []
+    for u in range(N):
+        for v in range(N):
+            if u == v:
+                continue
+            if A[u, v]:
+                moves.append((('delete', (u, v)), [family(A, v)],
+                              [family(A, v, remove=u)]))
+                # reversal is legal if u->v is the only path from u to v
+                if npa[u] < maxparents:
+                    B = A.copy()
+                    B[u, v] = 0
+                    if not reachability(B)[u, v]:
+                        moves.append((('reverse', (u, v)),
+                                      [family(A, v), family(A, u)],
+                                      [family(A, v, remove=u),
+                                       family(A, u, add=v)]))
+            elif not A[v, u] and not reach[v, u] and npa[v] < maxparents:
+                moves.append((('add', (u, v)), [family(A, v)],
+                              [family(A, v, add=u)]))
+    return moves
+
+
+def reachability(A):
+    """R[i, j] is True if there is a directed path of length >= 1 from i to j."""
+    R = np.asarray(A) != 0
+    while True:
+        newR = R | (R.astype(np.int64).dot(R.astype(np.int64)) > 0)
+        if (newR == R).all():
+            return R
+        R = newR
+
+
+class FamilyScorer:
+    """
+    Cache of family scores and of the contingency counts they are computed
+    from, keyed by (child, sorted parents) and by sorted variable tuples.
+    The counts of a family are obtained by summing out a cached count table
+    over a superset of its variables when there is one.
+    """
+    def __init__(self, rows, weights, nstates, score='BIC', ess=1.0):
+        self.rows = rows
+        self.weights = weights
+        self.nstates = nstates
+        self.score = score
+        self.ess = ess
+        self.scores = {}
+        self.counts = {}
+
+    def update(self, families, executor=None, workers=1):
+        """Score all families that are not in the cache yet."""
+        new = [f for f in families if f not in self.scores]
+        if executor is not None and len(new) > 1:
+            chunksize = max(1, len(new) // (4 * workers))
+            for f, s in zip(new, executor.map(_workerscore, new,
+                                              chunksize=chunksize)):
+                self.scores[f] = s
+        else:
+            for f in new:
+                self.scores[f] = self.familyscore(f)
+
+    def familyscore(self, key):
+        v, pa = key
+        variables = tuple(sorted((v,) + pa))
+        c = self.count(variables)
+        # child on axis 0, parent configurations flattened on axis 1
+        c = np.moveaxis(c, variables.index(v), 0).reshape(self.nstates[v], -1)
+        return familyscore(c, self.weights.sum(), self.score, self.ess)
+
+    def count(self, variables):
+        if variables in self.counts:
+            return self.counts[variables]
+        for w in range(self.nstates.size):
+            other = tuple(sorted(variables + (w,)))
+            if w not in variables and other in self.counts:
+                c = self.counts[other].sum(axis=other.index(w))
+                break
+        else:
+            nstates = self.nstates[list(variables)]
+            if variables:
+                L = np.ravel_multi_index(tuple(self.rows[:, variables].T),
+                                         tuple(nstates))
+            else:
+                L = np.zeros(self.rows.shape[0], dtype=np.intp)
+            c = np.bincount(L, weights=self.weights,
+                            minlength=int(np.prod(nstates)))
+            c = c.reshape(tuple(nstates))
+        self.counts[variables] = c
+        return c
+
+
+def familyscore(counts, n, score='BIC', ess=1.0):
+    """
+    Score of one family from its counts[child state, parent configuration]
+    out of n observations.
+    """
+    r, q = counts.shape
+    nj = counts.sum(axis=0)
+    if score == 'BIC':
+        nz = counts > 0
+        ll = np.sum(counts[nz] * np.log(counts[nz] / np.broadcast_to(
+            nj, counts.shape)[nz]))
+        return float(ll - 0.5 * math.log(max(n, 1)) * q * (r - 1))
+    aj = ess / q
+    ajk = ess / (q * r)
+    return float(np.sum(_lgamma(aj) - _lgamma(aj + nj)) +
+                 np.sum(_lgamma(ajk + counts) - _lgamma(ajk)))
+
+
+_worker = {}
+
+
+def _initworker(rows, weights, nstates, score, ess):
+    _worker['scorer'] = FamilyScorer(rows, weights, nstates, score, ess)
+
+
+def _workerscore(key):
+    return _worker['scorer'].familyscore(key)
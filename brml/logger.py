@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Logging and tracing for the brml package.
+
+All modules log to children of the 'brml' logger, which has a NullHandler
+so nothing is printed unless the application configures logging, e.g.
+    brml.logger.setlevel(logging.DEBUG)
+
+The potential operations are wrapped with traced(). While no trace sink is
+registered the wrapper only checks an empty list before calling the
+operation. A sink is any callable taking an event dict
+    {'operation': 'condpot', 'depth': 0, 'start': ..., 'duration': ...,
+     'inputs': [table shapes], 'output': table shape}
+where depth is the number of traced calls the call is nested in.
+tracefile() returns a sink that appends the events as JSON lines:
+    with tracing('trace.jsonl'):
+        condpot(setpot(multpots(pot), alarm, yes), burglar)
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger('brml')
+logger.addHandler(logging.NullHandler())
+
+_sinks = []
+_depth = threading.local()
+
+
+def setlevel(level, handler=None):
+    """
+    Set the level of the brml logger and, if it has no handler yet, attach
+    handler (a StreamHandler to stderr by default).
+    """
+    logger.setLevel(level)
+    if not any(not isinstance(h, logging.NullHandler)
+               for h in logger.handlers):
+        handler = handler or logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(name)s %(levelname)s: %(message)s'))
+        logger.addHandler(handler)
+
+
+def addsink(sink):
+    """Register a callable that receives every trace event."""
+    if sink not in _sinks:
+        _sinks.append(sink)
+    return sink
+
+
+def removesink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def tracefile(path):
+    """Return a sink writing the trace events to path as JSON lines."""
+    return TraceFile(path)
+
+
+@contextmanager
+def tracing(sink):
+    """
+    Send the trace events of the enclosed block to sink, a callable or a
+    file name (see tracefile).
+    """
+    if not callable(sink):
+        sink = tracefile(sink)
+    addsink(sink)
+    try:
+        yield sink
+    finally:
+        removesink(sink)
+        if isinstance(sink, TraceFile):
+            sink.close()
+
+
+class TraceFile:
+    """Trace sink appending one JSON object per event to a file."""
+    def __init__(self, path):
+        self.file = open(path, 'a')
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event)
+        with self.lock:
+            self.file.write(line + '\n')
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def traced(operation):
+    """Decorator emitting a trace event for every call of operation."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return fn(*args, **kwargs)
+            depth = getattr(_depth, 'value', 0)
+            _depth.value = depth + 1
+            start = time.time()
+            t0 = time.perf_counter()
+            try:
+                out = fn(*args, **kwargs)
+            finally:
+                _depth.value = depth
+            event = {'operation': operation,
+                     'depth': depth,
+                     'start': start,
+                     'duration': time.perf_counter() - t0,
+                     'inputs': [s for a in args for s in tableshapes(a)],
+                     'output': (tableshapes(out) or [None])[0]}
+            for sink in list(_sinks):
+                sink(event)
+            return out
+        return wrapper
+    return decorator
+
+
+def tableshapes(obj):
+    """Shapes of the tables of a potential or of a list of potentials."""
+    if hasattr(obj, 'table'):
+        return [list(getattr(obj.table, 'shape', ()))]
+    if isinstance(obj, (list, tuple)):
+        return [list(getattr(o.table, 'shape', ())) for o in obj
+                if hasattr(o, 'table')]
+    return []
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Mini-bucket elimination.
+
+Variables are eliminated along an order. The functions in the bucket of a
+variable are split into mini-buckets whose joint scope has at most ibound
+variables, and the variable is eliminated from every mini-bucket on its
+own: summed out in the first one and maximised out (upper bound) or
+minimised out (lower bound) in the others. No generated table has more
+than ibound - 1 variables, so memory and time are fixed by ibound (the
+input tables are used as they are). With ibound at least the induced width
+plus one this is exact variable elimination.
+
+    lower, upper = partitionbounds(pot, ibound=10)      # bounds on log Z
+    lower, upper = marginalbounds(pot, x, 10, evvariables, evstates)
+"""
+import numpy as np
+from brml.potential import Potential
+from brml.setpot import setpot
+from brml.chunked import sumout
+from brml.jtree import minfillorder
+
+
+def minibucket(pot, ibound, order=None, bound='upper'):
+    """
+    Bound on the log of the sum of the product of the potentials.
+        logz = minibucket(pot, ibound, order, bound)
+
+    pot: list of potentials
+    ibound: maximum number of variables of a mini-bucket
+    order: elimination order (greedy min-fill if missing)
+    bound: 'upper' or 'lower'
+    """
+    if bound not in ('upper', 'lower'):
+        raise ValueError('bound must be upper or lower')
+    if int(ibound) < 1:
+        raise ValueError('ibound must be at least 1')
+    ibound = int(ibound)
+    # a potential without variables (all of them set) is a constant factor
+    with np.errstate(divide='ignore'):
+        logz = float(sum(np.log(np.sum(p.table)) for p in pot
+                         if np.asarray(p.variables).size == 0))
+    if logz == -np.inf:
+        return -np.inf
+    pot = [p for p in pot if np.asarray(p.variables).size]
+    if order is None:
+        order = minfillorder(pot)
+    position = dict((int(v), i) for i, v in enumerate(order))
+    buckets = [[] for v in order]
+
+    def place(p):
+        vs = np.asarray(p.variables).reshape(-1)
+        buckets[min(position[int(v)] for v in vs)].append(p)
+
+    for p in pot:
+        place(p)
+    for i, v in enumerate(order):
+        for k, mini in enumerate(partition(buckets[i], ibound)):
+            p = mini[0]
+            for q in mini[1:]:
+                p = p * q
+            axis = list(np.asarray(p.variables).reshape(-1)).index(int(v))
+            if k == 0:
+                table = sumout(p.table, [axis])
+            elif bound == 'upper':
+                table = np.max(p.table, axis=axis)
+            else:
+                table = np.min(p.table, axis=axis)
+            scale = np.max(table)
+            if scale <= 0:
+                return -np.inf
+            logz += np.log(scale)
+            if np.ndim(table) == 0:
+                continue
+            h = Potential()
+            h.variables = np.delete(np.asarray(p.variables).reshape(-1), axis)
+            h.card = np.array(np.shape(table))
+            h.table = table / scale
+            place(h)
+        buckets[i] = None
+    return logz
+
+
+def partition(functions, ibound):
+    """
+    Split functions into groups whose joint scope has at most ibound
+    variables (first fit, largest scopes first). A function with a larger
+    scope is a group of its own.
+    """
+    groups = []
+    scopes = []
+    for f in sorted(functions, key=lambda f: -np.size(f.variables)):
+        vs = set(int(v) for v in np.asarray(f.variables).reshape(-1))
+        for g, scope in zip(groups, scopes):
+            if len(scope | vs) <= ibound:
+                g.append(f)
+                scope |= vs
+                break
+        else:
+            groups.append([f])
+            scopes.append(vs)
+    return groups
+
+
+def partitionbounds(pot, ibound, order=None):
+    """Lower and upper bounds on log Z, the log normaliser of pot."""
+    return (minibucket(pot, ibound, order, 'lower'),
+            minibucket(pot, ibound, order, 'upper'))
+
+
+def marginalbounds(pot, variable, ibound, evvariables=(), evstates=(),
+                   order=None):
+    """
+    Lower and upper bounds on p(variable|evidence), one per state.
+
+    Every state s of variable is set as evidence and log Z(s) is bounded by
+    mini-bucket elimination, then
+        p(s) >= L(s) / (L(s) + sum of U(s') for s' != s)
+        p(s) <= U(s) / (U(s) + sum of L(s') for s' != s)
+    """
+    variable = int(variable)
+    evvariables = np.asarray(evvariables, dtype=int).reshape(-1)
+    evstates = np.asarray(evstates, dtype=int).reshape(-1)
+    card = None
+    for p in pot:
+        vs = [int(v) for v in np.asarray(p.variables).reshape(-1)]
+        if variable in vs:
+            card = np.shape(p.table)[vs.index(variable)]
+    if card is None:
+        raise ValueError('variable %d is not in the potentials' % variable)
+    if order is not None:
+        order = [int(v) for v in order
+                 if int(v) != variable and int(v) not in evvariables]
+    lower = np.empty(card)
+    upper = np.empty(card)
+    for s in range(card):
+        ev = np.append(evvariables, variable)
+        st = np.append(evstates, s)
+        clamped = []
+        for p in pot:
+            mask = np.isin(ev, p.variables)
+            clamped.append(setpot(p, ev[mask], st[mask]) if mask.any() else p)
+        lower[s], upper[s] = partitionbounds(clamped, ibound, order)
+    # the bounds on Z(s) relative to the largest upper bound
+    lo = np.exp(lower - upper.max())
+    up = np.exp(upper - upper.max())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pl = lo / (lo + up.sum() - up)
+        pu = up / (up + lo.sum() - lo)
+    return np.nan_to_num(pl), np.minimum(np.nan_to_num(pu), 1.0)
@@ -9,8 +9,10 @@ potentials with empty tables are ignored
 if a table of type 'zero' is encountered, the result is a table of type
 'zero' with table 0, and empty variables.
 """
+from brml.logger import traced
 
 
+@traced('multpots')
 def multpots(pots):
     # import copy
     newpot = pots[0]
@@ -4,10 +4,13 @@
 same as myzeros() in MATLAB
 MYZEROS same as zeros(x) but if x is a scalar interprets as zeros([x 1])
 """
+import logging
 import numpy as np
 
+log = logging.getLogger(__name__)
+
 def myzeros(x):
-    print("x =", x)
+    log.debug("x = %s", x)
     x = np.array(x)
     if x.size > 1:
         out=np.zeros(x)
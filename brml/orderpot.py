@@ -9,8 +9,10 @@ import numpy as np
 import copy
 from .index_to_assignment import index_to_assignment
 from .potential import Potential
+from .logger import traced
 
 
+@traced('orderpot')
 def orderpot(pot, varargin):
     """
     Return potential with variables reordered according to orderpot. If order
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Evaluate independent queries on a network with a pool of processes.
+
+The tables of the network are copied once into a block of shared memory;
+the worker processes map that block and rebuild the potentials as views on
+it, so a task only sends its query arguments and not the network:
+
+    with QueryExecutor(pot, workers=8) as ex:
+        posteriors = ex.map([(burglar, alarm, yes), (burglar, radio, yes)])
+
+A query is (variables, evidence variables, evidence states), optionally
+with a fourth entry listing the potentials to use; components(pot) splits
+a network into its unconnected parts, which can be evaluated as separate
+tasks.
+"""
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from brml.potential import Potential
+from brml.multpots import multpots
+from brml.setpot import setpot
+from brml.condpot import condpot
+
+
+class QueryExecutor:
+    def __init__(self, pot, workers=None):
+        self.layout = []
+        offset = 0
+        for p in pot:
+            table = np.asarray(p.table, dtype=float)
+            self.layout.append((np.asarray(p.variables), np.asarray(p.card),
+                                offset, table.shape))
+            offset += table.size
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=max(offset, 1) * 8)
+        try:
+            data = np.ndarray(offset, dtype=float, buffer=self.shm.buf)
+            for p, (v, c, start, shape) in zip(pot, self.layout):
+                data[start:start + int(np.prod(shape))] = \
+                    np.asarray(p.table, dtype=float).reshape(-1)
+            del data
+            self.pool = ProcessPoolExecutor(workers, initializer=_initworker,
+                                            initargs=(self.shm.name,
+                                                      self.layout))
+        except BaseException:
+            # the segment would outlive the process otherwise
+            self.shm.close()
+            self.shm.unlink()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, fn, *args):
+        """
+        Run fn(pot, *args) in a worker, where pot is the list of potentials
+        backed by shared memory. fn must be a picklable (module level)
+        function. Returns a concurrent.futures.Future.
+        """
+        return self.pool.submit(_workercall, fn, args)
+
+    def map(self, queries, chunksize=1):
+        """
+        Evaluate every query (variables, evvariables, evstates[, subset])
+        and return the list of posterior potentials.
+        """
+        queries = [tuple(q) + (None,) * (4 - len(q)) for q in queries]
+        return list(self.pool.map(_workerquery, queries,
+                                  chunksize=chunksize))
+
+    def close(self):
+        self.pool.shutdown()
+        self.shm.close()
+        self.shm.unlink()
+
+
+def query(pot, variables, evvariables=(), evstates=(), subset=None):
+    """
+    Posterior p(variables|evidence) of a network: the evidence is set in
+    every potential before the potentials are multiplied.
+    """
+    if subset is not None:
+        pot = [pot[i] for i in subset]
+    evvariables = np.asarray(evvariables).reshape(-1)
+    evstates = np.asarray(evstates).reshape(-1)
+    newpot = []
+    for p in pot:
+        mask = np.isin(evvariables, p.variables)
+        if mask.any():
+            p = setpot(p, evvariables[mask], evstates[mask])
+        newpot.append(p)
+    return condpot(multpots(newpot), np.asarray(variables).reshape(-1))
+
+
+def components(pot):
+    """
+    Split a network into its connected components (potentials linked by
+    shared variables). Returns a list of lists of potential indices.
+    """
+    parent = {}
+
+    def find(v):
+        while parent.setdefault(v, v) != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for p in pot:
+        variables = [int(v) for v in np.asarray(p.variables).reshape(-1)]
+        for v in variables[1:]:
+            parent[find(v)] = find(variables[0])
+    groups = {}
+    for i, p in enumerate(pot):
+        variables = np.asarray(p.variables).reshape(-1)
+        key = find(int(variables[0])) if variables.size else None
+        groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+
+_worker = {}
+
+
+def _initworker(name, layout):
+    shm = shared_memory.SharedMemory(name=name)
+    data = np.ndarray(sum(int(np.prod(l[3])) for l in layout), dtype=float,
+                      buffer=shm.buf)
+    pot = []
+    for variables, card, start, shape in layout:
+        p = Potential()
+        p.variables = variables
+        p.card = card
+        p.table = data[start:start + int(np.prod(shape))].reshape(shape)
+        p.table.flags.writeable = False
+        pot.append(p)
+    _worker['shm'] = shm  # keep the mapping alive
+    _worker['pot'] = pot
+
+
+def _workerquery(q):
+    variables, evvariables, evstates, subset = q
+    if evvariables is None:
+        evvariables, evstates = (), ()
+    return query(_worker['pot'], variables, evvariables, evstates, subset)
+
+
+def _workercall(fn, args):
+    return fn(_worker['pot'], *args)
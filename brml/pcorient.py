@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+
+
+def pcorient(S, sepset, extend=True):
+    """
+    Orient the skeleton found by pcskeleton.
+        A = pcorient(S, sepset, <extend>)
+
+    Every unshielded triple x - z - y with z not in the separating set of x
+    and y becomes the v-structure x -> z <- y; further edges are then
+    oriented with Meek's rules R1-R3 until nothing changes. This gives the
+    essential graph, in which the undirected edges are those whose
+    direction cannot be decided from independence tests alone.
+
+    Parameters
+    ----------
+
+    S: np.ndarray
+        Symmetric adjacency matrix of the skeleton.
+
+    sepset: dict
+        sepset[(x, y)] (x < y) is the set that separates x and y.
+
+    extend: bool (optional)
+        If True (default) the remaining undirected edges are oriented so
+        that the result is a DAG with the same v-structures (Dor and Tarsi
+        extension). If False, undirected edges are returned with both
+        A[i, j] and A[j, i] set.
+
+    Returns
+    -------
+
+    A: np.ndarray
+        Adjacency matrix, A[i, j] = 1 if i is a parent of j (same format as
+        dag).
+    """
+    S = (np.asarray(S) != 0)
+    N = S.shape[0]
+    A = S.astype(int)
+
+    for z in range(N):
+        nb = np.nonzero(S[z])[0]
+        for i, x in enumerate(nb):
+            for y in nb[i + 1:]:
+                if S[x, y] or z in sepset.get((min(x, y), max(x, y)), ()):
+                    continue
+                if A[x, z] and A[y, z]:
+                    A[z, x] = A[z, y] = 0
+
+    changed = True
+    while changed:
+        changed = False
+        undirected = np.argwhere(np.triu(A & A.T))
+        for a, b in undirected:
+            for x, y in ((a, b), (b, a)):
+                if A[y, x] and meek(A, S, x, y):
+                    A[y, x] = 0
+                    changed = True
+                    break
+
+    if extend:
+        A = dagextension(A)
+    return A.astype(float)
+
+
+def meek(A, S, x, y):
+    """True if Meek's rules R1-R3 orient the undirected edge x - y as x -> y."""
+    directed = (A == 1) & (A.T == 0)
+    undirected = (A == 1) & (A.T == 1)
+    # R1: w -> x - y with w, y not adjacent
+    if np.any(directed[:, x] & ~S[:, y] & (np.arange(A.shape[0]) != y)):
+        return True
+    # R2: x -> w -> y
+    if np.any(directed[x, :] & directed[:, y]):
+        return True
+    # R3: x - w1 -> y, x - w2 -> y, w1 and w2 not adjacent
+    w = np.nonzero(undirected[x, :] & directed[:, y])[0]
+    for i, w1 in enumerate(w):
+        for w2 in w[i + 1:]:
+            if not S[w1, w2]:
+                return True
+    return False
+
+
+def dagextension(A):
+    """
+    Orient the undirected edges (A[i, j] = A[j, i] = 1) of a partially
+    directed graph into a DAG without new v-structures (Dor and Tarsi).
+    """
+    A = A.copy()
+    left = list(range(A.shape[0]))
+    P = A.copy()  # the graph on the nodes that are left
+    while left:
+        for x in left:
+            directed_out = P[x, :] & (1 - P[:, x])
+            if directed_out.any():
+                continue
+            nb = np.nonzero(P[x, :] & P[:, x])[0]
+            adj = np.nonzero(P[x, :] | P[:, x])[0]
+            if all((P[y, adj[adj != y]] | P[adj[adj != y], y]).all()
+                   for y in nb):
+                break
+        else:
+            raise ValueError('partially directed graph has no DAG extension')
+        for y in np.nonzero(P[x, :] & P[:, x])[0]:
+            A[x, y] = 0  # orient y -> x
+        P[x, :] = 0
+        P[:, x] = 0
+        left.remove(x)
+    return A
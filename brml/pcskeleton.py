@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import math
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from brml.count import compressdata
+
+_erfc = np.vectorize(math.erfc, otypes=[float])
+
+
+def pcskeleton(data, nstates, alpha=0.01, maxsep=None, workers=1):
+    """
+    Learn the skeleton of a Belief Network with the PC algorithm.
+        S, sepset = pcskeleton(data, nstates, <alpha>, <maxsep>, <workers>)
+
+    Conditional independence is tested with the G^2 statistic. At level l
+    every remaining edge x-y is tested against all conditioning sets of size
+    l drawn from the neighbours of x and of y at the start of the level
+    (the order independent "PC-stable" variant), so all tests of a level
+    are independent of each other. The tests are grouped by conditioning
+    set: the index of the conditioning states and the count tables of the
+    set and of every tested variable with it are computed once per set and
+    shared by all tests of the group, and the groups are distributed over a
+    pool of worker processes. The data is reduced to its distinct rows
+    before counting.
+
+    Parameters
+    ----------
+
+    data: array_like or iterator of array_like
+        Integer data matrix (rows are observations, columns are variables,
+        states start from 0), or an iterator of such chunks.
+
+    nstates: array_like
+        Number of states of every variable.
+
+    alpha: float (optional)
+        Significance level of the independence tests.
+
+    maxsep: int (optional)
+        Largest conditioning set tried; unbounded if missing.
+
+    workers: int (optional)
+        Number of worker processes used for the tests.
+
+    Returns
+    -------
+
+    S: np.ndarray
+        Symmetric adjacency matrix of the skeleton.
+
+    sepset: dict
+        sepset[(x, y)] (x < y) is the set that separates x and y, for every
+        pair whose edge was removed.
+    """
+    nstates = np.asarray(nstates, dtype=int)
+    N = nstates.size
+    if maxsep is None:
+        maxsep = N - 2
+    rows, weights = compressdata(data, N)
+
+    S = np.ones((N, N), dtype=int)
+    np.fill_diagonal(S, 0)
+    sepset = {}
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers, initializer=_initworker,
+                                       initargs=(rows, weights, nstates,
+                                                 alpha))
+    try:
+        for level in range(maxsep + 1):
+            groups = citests(S, level)
+            if not groups:
+                break
+            keys = sorted(groups)
+            if executor is None:
+                results = [condindep(rows, weights, nstates, groups[k], k,
+                                     alpha) for k in keys]
+            else:
+                results = list(executor.map(_workercondindep,
+                                            [groups[k] for k in keys], keys))
+            # the edge is removed after the level; the first separating set
+            # in sorted order is kept, so the result is order independent
+            for cond, indep in zip(keys, results):
+                for (x, y), ind in zip(groups[cond], indep):
+                    if ind and (x, y) not in sepset:
+                        sepset[(x, y)] = cond
+            for (x, y) in sepset:
+                S[x, y] = S[y, x] = 0
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return S, sepset
+
+
+def citests(S, level):
+    """
+    All tests of one level of PC-stable, as a dict mapping every
+    conditioning set (a sorted tuple) to the list of pairs (x, y), x < y,
+    tested against it.
+    """
+    N = S.shape[0]
+    groups = {}
+    for x in range(N):
+        for y in range(x + 1, N):
+            if not S[x, y]:
+                continue
+            for a, b in ((x, y), (y, x)):
+                adj = [v for v in np.nonzero(S[a])[0] if v != b]
+                for cond in itertools.combinations(adj, level):
+                    groups.setdefault(tuple(int(c) for c in cond),
+                                      set()).add((x, y))
+    return dict((k, sorted(v)) for k, v in groups.items())
+
+
+def condindep(rows, weights, nstates, pairs, cond, alpha=0.01):
+    """
+    G^2 tests of x _|_ y | cond for all (x, y) in pairs. The conditioning
+    index and the count tables n(cond) and n(v, cond) of every variable v
+    of the pairs are computed once and shared by all the tests; only
+    n(x, y, cond) is counted per test. Returns a boolean array, True for
+    independence.
+    """
+    cond = list(cond)
+    if cond:
+        LS = np.ravel_multi_index(tuple(rows[:, cond].T),
+                                  tuple(nstates[cond]))
+    else:
+        LS = np.zeros(rows.shape[0], dtype=np.intp)
+    q = int(np.prod(nstates[cond]))
+    ns = np.bincount(LS, weights=weights, minlength=q)
+    counts = {}
+    for v in sorted(set(v for pair in pairs for v in pair)):
+        counts[v] = np.bincount(rows[:, v] * q + LS, weights=weights,
+                                minlength=nstates[v] * q).reshape(-1, q)
+
+    g2 = np.zeros(len(pairs))
+    dof = np.zeros(len(pairs))
+    for i, (x, y) in enumerate(pairs):
+        rx, ry = nstates[x], nstates[y]
+        L = (rows[:, x] * ry + rows[:, y]) * q + LS
+        nxys = np.bincount(L, weights=weights, minlength=rx * ry * q)
+        nxys = nxys.reshape(rx, ry, q)
+        expected = counts[x][:, None, :] * counts[y][None, :, :] / \
+            np.where(ns > 0, ns, 1)
+        nz = nxys > 0
+        g2[i] = 2 * np.sum(nxys[nz] * np.log(nxys[nz] / expected[nz]))
+        dof[i] = max((rx - 1) * (ry - 1) * q, 1)
+    return chi2sf(g2, dof) > alpha
+
+
+def chi2sf(x, dof):
+    """
+    Survival function of the chi-square distribution (Wilson-Hilferty
+    approximation), vectorised over x and dof.
+    """
+    x = np.maximum(np.asarray(x, dtype=float), 0)
+    dof = np.asarray(dof, dtype=float)
+    h = 2.0 / (9 * dof)
+    z = ((x / dof) ** (1.0 / 3) - (1 - h)) / np.sqrt(h)
+    return 0.5 * _erfc(z / math.sqrt(2))
+
+
+_worker = {}
+
+
+def _initworker(rows, weights, nstates, alpha):
+    _worker.update(rows=rows, weights=weights, nstates=nstates, alpha=alpha)
+
+
+def _workercondindep(pairs, cond):
+    return condindep(_worker['rows'], _worker['weights'], _worker['nstates'],
+                     pairs, cond, _worker['alpha'])
@@ -1,17 +1,14 @@
 #!/usr/bin/env python
 
 "Basic Class: potential"
-if __name__ == '__main__':
-    print('PotentialClass is running by itself')
-else:
-    print('PotentialClass is imported as module')
 
+import logging
 import numpy as np
 import copy
-from brml.intersect import intersect
-from brml.ismember import ismember
-from brml.index_to_assignment import index_to_assignment
+from brml.logger import traced
+from brml.chunked import multiply
 
+log = logging.getLogger(__name__)
 
 class Potential:
     def __init__(self, variables=np.array([]), card=np.array([]),
@@ -20,6 +17,7 @@ class Potential:
         self.card = card
         self.table = table
 
+    @traced('multiply')
     def __mul__(self, other):
         # check for empty potential
         if self.variables.size == 0:
@@ -27,42 +25,34 @@ class Potential:
         if other.variables.size == 0:
             return self
 
-        commonitem = np.intersect1d(self.variables, other.variables)
-        idx1 = np.in1d(self.variables, commonitem).nonzero()
-        idx2 = np.in1d(other.variables, commonitem).nonzero()
-        if commonitem.size > 0:
-            assert np.allclose(self.card[idx1], other.card[idx2])
-
         newpot = Potential()
-        #FIX ME: dimension consistency not checked
-        #FIX ME: only 1-D multiply considered
-
         newpot.variables = np.union1d(self.variables, other.variables)
         # sorted union of input arrays
-        dummy, mapA = ismember(self.variables, newpot.variables)
-        dummy, mapB = ismember(other.variables, newpot.variables)
+        mapA = np.searchsorted(newpot.variables, self.variables)
+        mapB = np.searchsorted(newpot.variables, other.variables)
 
-        newpot.card = np.zeros(newpot.variables.size, 'int8')
+        newpot.card = np.zeros(newpot.variables.size, int)
         newpot.card[mapA] = list(self.card)
         newpot.card[mapB] = list(other.card)
+        # the shared variables must have the same number of states
+        assert np.array_equal(newpot.card[mapA], self.card)
 
-        newpot.table = np.zeros(tuple(newpot.card))
-        for i in range(np.prod(newpot.card)):
-            assignment = index_to_assignment(i, newpot.card)
-            assign1 = np.array(assignment)[mapA]
-            assign2 = np.array(assignment)[mapB]
-            newpot.table[tuple(assignment)] = self.table[tuple(assign1)] *\
-                other.table[tuple(assign2)]
-
+        # line up both tables with the axes of the new potential and let
+        # the product broadcast over the axes each of them is missing
+        n = newpot.variables.size
+        newpot.table = multiply(_broadcastable(self.table, mapA, n),
+                                _broadcastable(other.table, mapB, n))
         return newpot
 
+    @traced('divide')
     def __truediv__(self, other):
         #FIXME: works only 1-D considered, not completed
         newpot = copy.copy(self)
-        newpot.variables = intersect(self.variables, other.variables)
-        print("current divided newpot.variables=", newpot.variables)
+        # other is a scalar or a potential on a subset of the variables
+        newpot.variables = self.variables
+        log.debug("current divided newpot.variables= %s", newpot.variables)
         newpot.table = self.table/other.table
-        print("current divided table: \n", newpot.table)
+        log.debug("current divided table: \n%s", newpot.table)
         return newpot
 
     def size(self):
@@ -70,9 +60,22 @@ class Potential:
         table = np.array(self.table)
         dim = table.ndim
         if dim == 0:
-            print("ERRRRRRRRRRRRRRRRRR")
+            log.error("size of a potential with a 0-d table")
         elif dim > len(var):
             size = np.array(table.shape).size
-            print("adjusted!!!!!!")
+            log.debug("size adjusted to the table dimension")
 
         return size  # np.array format
+
+
+def _broadcastable(table, axes, n):
+    """
+    View of table with n dimensions in which table's axis i is axis axes[i]
+    and all other axes have size 1.
+    """
+    table = np.asarray(table)
+    axes = np.asarray(axes)
+    order = np.argsort(axes)
+    shape = np.ones(n, int)
+    shape[axes[order]] = np.array(table.shape)[order]
+    return np.transpose(table, order).reshape(shape)
@@ -53,23 +53,22 @@ def potvariables(pots):
             raise ValueError('No.%d field of table and variables should not\
                                 be different size', i)
 
-    variables = list(pots[0].variables)
-    nstates = list(pots[0].table.shape)
-    con = 1
-    convec = list(np.ones(len(variables), 'int8'))
+    # all (variable, number of states) pairs, in the order of the pots
+    allvars = np.concatenate([np.asarray(pot.variables).reshape(-1)
+                              for pot in pots])
+    allstates = np.concatenate([np.shape(pot.table) for pot in pots])
+    allstates = allstates.astype(int)
+    unique, first, inverse = np.unique(allvars, return_index=True,
+                                       return_inverse=True)
+    # a variable conflicts if any of its entries differs from the first one
+    differs = allstates != allstates[first][inverse]
+    mismatch = np.bincount(inverse, weights=differs,
+                           minlength=unique.size) > 0
+    order = np.argsort(first, kind='stable')
 
-    for pot in pots[1:]:
-        vs = pot.variables
-        ns = list(pot.table.shape)
-        for i, v in enumerate(vs):
-            if v in variables:
-                idx_va = variables.index(v)
-                if ns[i] != nstates[idx_va]:
-                    convec[idx_va] = 0
-                    con = 0
-            else:
-                variables.append(v)
-                nstates.append(ns[i])
-                convec.append(1)
+    variables = list(allvars[first[order]])
+    nstates = [int(n) for n in allstates[first[order]]]
+    convec = [int(c) for c in ~mismatch[order]]
+    con = int(all(convec))
 
     return variables, nstates, con, convec
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Operation counters for the potential algebra.
+
+A Profiler is a trace sink (see brml.logger) that aggregates, per
+operation, the number of calls, the wall time, the number of table cells
+touched (input plus output cells) and the largest table produced. Use one
+per query
+    with Profiler() as prof:
+        condpot(setpot(multpots(pot), alarm, yes), burglar)
+    prof.report()
+A Profiler only counts the operations of the thread that started it, so
+queries profiled at the same time in other threads do not mix their
+counters. Collect for the whole process (all threads) with enable() /
+disable() / report().
+Nothing is recorded, and the operations run at full speed, while no
+profiler is active.
+"""
+import json
+import threading
+import numpy as np
+from brml.logger import addsink, removesink
+
+
+class Profiler:
+    def __init__(self, allthreads=False):
+        """allthreads: count the operations of every thread"""
+        self.allthreads = allthreads
+        self.thread = None
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+            self.time = 0.0
+            self.peakcells = 0
+
+    def start(self):
+        self.thread = threading.get_ident()
+        addsink(self)
+        return self
+
+    def stop(self):
+        removesink(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __call__(self, event):
+        # the sinks are called in the thread running the operation
+        if not self.allthreads and threading.get_ident() != self.thread:
+            return
+        incells = sum(int(np.prod(s)) for s in event['inputs'])
+        outcells = int(np.prod(event['output'])) \
+            if event['output'] is not None else 0
+        with self.lock:
+            s = self.stats.setdefault(event['operation'],
+                                      {'calls': 0, 'time': 0.0, 'cells': 0,
+                                       'peakcells': 0})
+            s['calls'] += 1
+            s['time'] += event['duration']
+            s['cells'] += incells + outcells
+            s['peakcells'] = max(s['peakcells'], outcells)
+            self.peakcells = max(self.peakcells, outcells)
+            if event.get('depth', 0) == 0:
+                self.time += event['duration']
+
+    def report(self):
+        """
+        Return the counters as a dict:
+            {'operations': {name: {'calls', 'time', 'cells', 'peakcells'}},
+             'time': wall time of the outermost operations,
+             'peakcells': largest table produced}
+        """
+        with self.lock:
+            return {'operations': dict((k, dict(v))
+                                       for k, v in self.stats.items()),
+                    'time': self.time,
+                    'peakcells': self.peakcells}
+
+    def tojson(self, path=None, indent=2):
+        """Return the report as a JSON string, and write it to path if given."""
+        text = json.dumps(self.report(), indent=indent, sort_keys=True)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+
+_global = Profiler(allthreads=True)
+
+
+def enable():
+    """Start collecting counters for all operations in the process."""
+    return _global.start()
+
+
+def disable():
+    _global.stop()
+
+
+def reset():
+    _global.reset()
+
+
+def report():
+    return _global.report()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+from brml.sparsedag import SparseDAG
+from brml.setpot import setpot
+
+
+def prunepots(pot, variables, evvariables=(), evstates=()):
+    """
+    Remove the potentials of a Belief Network that are irrelevant for
+    p(variables|evvariables=evstates) and set the evidence in the others.
+        newpot = prunepots(pot, variables, evvariables, evstates)
+
+    The product of newpot is proportional to p(variables, evidence) on the
+    remaining variables, so any inference routine (multpots and condpot,
+    JunctionTree, batchcondpot) can be run on it instead of on pot.
+
+    Parameters
+    ----------
+
+    pot: list of brml.potential.Potential
+        The conditional probability tables p(v|pa(v)), v the first variable
+        of every potential.
+
+    variables: array_like
+        The query variables.
+
+    evvariables, evstates: array_like
+        The evidence variables and their states.
+
+    Returns
+    -------
+
+    newpot: list of brml.potential.Potential
+        The relevant potentials, without the evidence variables.
+    """
+    evvariables = np.asarray(evvariables, dtype=int).reshape(-1)
+    evstates = np.asarray(evstates, dtype=int).reshape(-1)
+    newpot = []
+    for i in relevant(pot, variables, evvariables):
+        p = pot[i]
+        mask = np.isin(evvariables, p.variables)
+        if mask.any():
+            p = setpot(p, evvariables[mask], evstates[mask])
+        newpot.append(p)
+    return newpot
+
+
+def relevant(pot, variables, evvariables=()):
+    """
+    Indices of the potentials needed for p(variables|evvariables).
+
+    Barren nodes are removed by keeping only the potentials of the
+    ancestors of the query and evidence variables. Of these, a potential is
+    kept if, once the evidence variables are removed, it shares a variable
+    with the connected component of the query variables (in the moral
+    graph of the ancestral set). The others are d-separated from the query
+    by the evidence and only contribute a constant factor.
+    """
+    variables = np.asarray(variables, dtype=int).reshape(-1)
+    evvariables = np.asarray(evvariables, dtype=int).reshape(-1)
+    graph = SparseDAG.frompots(pot)
+    nodes = np.union1d(variables, evvariables)
+    nodes = nodes[nodes < graph.N]
+    ancestral = np.zeros(graph.N, dtype=bool)
+    ancestral[nodes] = True
+    ancestral[graph.ancestors(nodes)] = True
+    isev = np.zeros(graph.N, dtype=bool)
+    isev[evvariables[evvariables < graph.N]] = True
+
+    parent = np.arange(graph.N)
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    candidates = []
+    for i, p in enumerate(pot):
+        pvars = np.asarray(p.variables, dtype=int).reshape(-1)
+        if pvars.size == 0 or not ancestral[pvars[0]]:
+            continue
+        free = pvars[~isev[pvars]]
+        if free.size == 0:
+            continue
+        candidates.append((i, free[0]))
+        for v in free[1:]:
+            parent[find(v)] = find(free[0])
+    roots = set(find(v) for v in variables if v < graph.N)
+    return [i for i, v in candidates if find(v) in roots]
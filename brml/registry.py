@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Network-level variable registry.
+
+The number of states of a variable is stored in every Potential that
+contains it (Potential.card, or the shape of its table) and its state names
+in Variable.domain. A VariableRegistry keeps one record per variable id, so
+that the number of states, name and domain of any variable are found in
+O(1) instead of by searching the potentials:
+
+    registry = VariableRegistry(pots, variables)
+    registry.card([burglar, alarm])          # array([2, 2])
+    registry.name(alarm), registry.domain(alarm)
+    registry.add(newpot)                     # checked against the records
+
+The numbers of states are kept in an array indexed by the variable id (-1
+where a variable is not known). Building the registry from a list of
+potentials and adding potentials to it are vectorised; a variable whose
+number of states disagrees with the registry or between the potentials
+raises ValueError and leaves the registry unchanged.
+"""
+import numpy as np
+from brml.variable import Variable
+
+
+class VariableRegistry:
+    def __init__(self, pots=(), variables=()):
+        """
+        pots: list of potentials
+        variables: list of Variable objects, variables[i] describes
+            variable i (None or an empty domain if unknown)
+        """
+        self.cards = np.full(0, -1, dtype=int)
+        self.names = {}
+        self.domains = {}
+        for v, variable in enumerate(variables):
+            if variable is not None:
+                self.setvariable(v, variable)
+        self.addpots(pots)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.cards >= 0))
+
+    def __contains__(self, v):
+        v = int(v)
+        return 0 <= v < self.cards.size and self.cards[v] >= 0
+
+    def variables(self):
+        """Array of the registered variable ids."""
+        return np.flatnonzero(self.cards >= 0)
+
+    def card(self, v):
+        """Number of states of v (an id or an array of ids)."""
+        v = np.asarray(v, dtype=int)
+        unknown = _unknown(self.cards, v)
+        if unknown:
+            raise ValueError('variables %s are not registered' % unknown)
+        cards = self.cards[v]
+        return int(cards) if cards.ndim == 0 else cards
+
+    def name(self, v):
+        return self.names.get(int(v))
+
+    def domain(self, v):
+        return self.domains.get(int(v))
+
+    def variable(self, v):
+        """Variable object of v."""
+        self.card(v)
+        return Variable(self.name(v), self.domain(v))
+
+    def add(self, pot):
+        """Register the variables of a potential."""
+        self.addpots([pot])
+
+    def addpots(self, pots):
+        """Register the variables of a list of potentials."""
+        pots = [p for p in pots if np.asarray(p.variables).size]
+        if not pots:
+            return
+        vs = np.concatenate([np.asarray(p.variables, dtype=int).reshape(-1)
+                             for p in pots])
+        ns = np.concatenate([np.shape(p.table) for p in pots]).astype(int)
+        if vs.size != ns.size:
+            raise ValueError('table and variables should be of the same size')
+        self._update(vs, ns)
+
+    def setvariable(self, v, variable):
+        """Register the name and domain of variable v (a Variable)."""
+        v = int(v)
+        domain = variable.domain
+        if domain:
+            self._update(np.array([v]), np.array([len(domain)]))
+            self.domains[v] = list(domain)
+        if variable.name:
+            self.names[v] = variable.name
+
+    def _update(self, vs, ns):
+        if np.any(vs < 0):
+            raise ValueError('variable ids should not be negative')
+        if np.any(ns < 1):
+            raise ValueError('variables should have at least one state')
+        # conflicts between the new entries: every entry of a variable must
+        # have the number of states of its first entry
+        unique, first, inverse = np.unique(vs, return_index=True,
+                                           return_inverse=True)
+        differs = ns != ns[first][inverse]
+        bad = unique[np.bincount(inverse, weights=differs,
+                                 minlength=unique.size) > 0]
+        # conflicts with the registered variables
+        inside = unique < self.cards.size
+        old = self.cards[unique[inside]]
+        clash = (old >= 0) & (old != ns[first][inside])
+        bad = np.union1d(bad, unique[inside][clash])
+        if bad.size:
+            raise ValueError('conflicting number of states for variables %s'
+                             % [int(v) for v in bad])
+        if unique[-1] >= self.cards.size:
+            # grow geometrically, so that adding potentials one at a time
+            # does not copy the array every time
+            size = max(2 * self.cards.size, int(unique[-1]) + 1)
+            cards = np.full(size, -1, dtype=int)
+            cards[:self.cards.size] = self.cards
+            self.cards = cards
+        self.cards[unique] = ns[first]
+
+
+def _unknown(cards, v):
+    # the ids of v without a number of states
+    v = np.asarray(v).reshape(-1)
+    inside = (v >= 0) & (v < cards.size)
+    known = np.zeros(v.size, dtype=bool)
+    known[inside] = cards[v[inside]] >= 0
+    return [int(u) for u in v[~known]]
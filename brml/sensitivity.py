@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+from brml.circuit import ArithmeticCircuit
+
+
+def sensitivity(model, variable, evidence=None):
+    """
+    Derivatives of the posterior p(variable|evidence) with respect to every
+    entry of every potential.
+        grads = sensitivity(pot, x, {alarm: yes})
+        grads[i][s]     # d p(x=s|e) / d pot[i].table, shape of the table
+
+    The network is compiled into an arithmetic circuit; the derivatives of
+    a circuit with respect to all its leaves come from one downward pass.
+    p(e) and p(x=s, e) for every state s are evaluated as columns of one
+    batch, so one upward and one downward sweep give all of them, and
+        d p(s|e) = (d p(s, e) - p(s|e) d p(e)) / p(e)
+    Each table entry is treated as a free parameter (the other entries of
+    its distribution are not changed with it).
+
+    Parameters
+    ----------
+
+    model: brml.circuit.ArithmeticCircuit or list of brml.potential.Potential
+        A compiled circuit or the potentials of the network.
+
+    variable: int
+        The query variable.
+
+    evidence: dict (optional)
+        Variable -> state.
+
+    Returns
+    -------
+
+    grads: list of np.ndarray
+        One array per potential, of shape (card(variable),) + table shape
+        (None for potentials without variables).
+    """
+    ac = model if isinstance(model, ArithmeticCircuit) else \
+        ArithmeticCircuit(model)
+    variable = int(variable)
+    evidence = dict((int(v), int(s)) for v, s in (evidence or {}).items())
+    if variable in evidence:
+        raise ValueError('the query variable is observed')
+    card = ac.card[variable]
+    # column 0: the evidence, column 1 + s: the evidence and variable = s
+    batch = dict((v, np.full(card + 1, s)) for v, s in evidence.items())
+    batch[variable] = np.arange(-1, card)
+    values = ac.upward(batch)
+    deriv = ac.downward(values)
+    pe = values[ac.root, 0]
+    if pe <= 0:
+        raise ValueError('the evidence has probability zero')
+    posterior = values[ac.root, 1:] / pe
+    grads = []
+    for ids in ac.parameter:
+        if ids is None:
+            grads.append(None)
+            continue
+        d = deriv[ids]                          # table shape + (card + 1,)
+        d = np.moveaxis(d, -1, 0)
+        grads.append((d[1:] - posterior.reshape((-1,) + (1,) * ids.ndim) *
+                      d[:1]) / pe)
+    return grads
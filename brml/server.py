@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Local inference server.
+
+The server loads the networks once and answers queries sent as JSON lines
+over a TCP or Unix domain socket:
+
+    {"id": 1, "network": "burglar", "type": "posterior",
+     "variables": [0], "evidence": {"2": 0}}
+    -> {"id": 1, "variables": [0], "table": [0.99, 0.01]}
+
+    {"id": 2, "network": "burglar", "type": "map",
+     "variables": [0, 1], "evidence": {"2": 0}}
+    -> {"id": 2, "variables": [0, 1], "states": [0, 1], "prob": 0.99}
+
+    {"type": "stats"}
+    -> {"count": ..., "p50": ..., "p90": ..., "p99": ..., "batch": ...}
+
+A "map" query returns the most likely joint state of its variables. The
+requests that arrive within batchwindow seconds and share the network,
+query variables and evidence variables are answered by one batchcondpot
+call over a batch axis. Latencies (from reading a request to writing its
+answer, in seconds) of the last 10000 requests are kept for the stats.
+
+    server = InferenceServer({'burglar': pot})
+    address = server.start()          # runs in a background thread
+    client = InferenceClient(address)
+    client.posterior('burglar', [0], {2: 0})
+    server.stop()
+"""
+import json
+import time
+import socket
+import asyncio
+import threading
+import collections
+import numpy as np
+from brml.batchcondpot import batchcondpot
+
+
+class InferenceServer:
+    def __init__(self, networks, address=('127.0.0.1', 0), batchwindow=0.002,
+                 maxbatch=1024):
+        """
+        networks: dict mapping a name to a list of potentials
+        address: (host, port) for TCP (port 0 picks a free port) or the path
+        of a Unix domain socket
+        """
+        self.networks = dict(networks)
+        # the number of states of every variable, to check the requests
+        self.cards = {}
+        for name, pot in self.networks.items():
+            card = self.cards.setdefault(name, {})
+            for p in pot:
+                for v, n in zip(np.asarray(p.variables).reshape(-1),
+                                np.shape(p.table)):
+                    card[int(v)] = int(n)
+        self.address = address
+        self.batchwindow = batchwindow
+        self.maxbatch = maxbatch
+        self.latency = collections.deque(maxlen=10000)
+        self.batchsizes = collections.deque(maxlen=10000)
+        self._pending = collections.OrderedDict()
+        self._flush = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def serve(self):
+        """Start listening; returns the bound address."""
+        self._loop = asyncio.get_running_loop()
+        if isinstance(self.address, str):
+            self._server = await asyncio.start_unix_server(self._handle,
+                                                           self.address)
+        else:
+            self._server = await asyncio.start_server(self._handle,
+                                                      *self.address)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        return self.address
+
+    def start(self):
+        """Run the server in a background thread; returns its address."""
+        ready = threading.Event()
+        self._stopped = None
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.serve())
+            self._stopped = loop.create_future()
+            ready.set()
+            loop.run_until_complete(self._stopped)
+            self._server.close()
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.address
+
+    def stop(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set_result, None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        lat = np.array(self.latency)
+        out = {'count': int(lat.size),
+               'batch': float(np.mean(self.batchsizes))
+               if self.batchsizes else 0.0}
+        for q in (50, 90, 99):
+            out['p%d' % q] = float(np.percentile(lat, q)) if lat.size else 0.0
+        return out
+
+    async def _handle(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            task = asyncio.ensure_future(self._answer(line, writer, lock))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        writer.close()
+
+    async def _answer(self, line, writer, lock):
+        start = time.perf_counter()
+        request = {}
+        timed = False
+        try:
+            request = json.loads(line)
+            if request.get('type') == 'stats':
+                response = self.stats()
+            else:
+                response = await self._submit(request)
+                timed = 'error' not in response
+        except Exception as e:
+            response = {'id': request.get('id'), 'error': str(e)}
+        async with lock:
+            writer.write((json.dumps(response) + '\n').encode())
+            await writer.drain()
+        if timed:
+            self.latency.append(time.perf_counter() - start)
+
+    def _submit(self, request):
+        kind = request.get('type', 'posterior')
+        if kind not in ('posterior', 'map'):
+            raise ValueError('unknown query type %s' % kind)
+        if request['network'] not in self.networks:
+            raise ValueError('unknown network %s' % request['network'])
+        evidence = sorted((int(v), int(s))
+                          for v, s in request.get('evidence', {}).items())
+        # a bad request is rejected on its own, before it joins a batch
+        card = self.cards[request['network']]
+        for v in request['variables']:
+            if int(v) not in card:
+                raise ValueError('unknown variable %s' % v)
+        for v, s in evidence:
+            if v not in card:
+                raise ValueError('unknown evidence variable %d' % v)
+            if not 0 <= s < card[v]:
+                raise ValueError('state %d of variable %d is out of range'
+                                 % (s, v))
+        key = (request['network'], kind,
+               tuple(int(v) for v in request['variables']),
+               tuple(v for v, s in evidence))
+        future = self._loop.create_future()
+        self._pending.setdefault(key, []).append(
+            (request.get('id'), [s for v, s in evidence], future))
+        if len(self._pending[key]) >= self.maxbatch:
+            self._runbatch(key)
+        elif self._flush is None:
+            self._flush = self._loop.call_later(self.batchwindow,
+                                                self._flushall)
+        return future
+
+    def _flushall(self):
+        self._flush = None
+        for key in list(self._pending):
+            self._runbatch(key)
+
+    def _runbatch(self, key):
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+        self.batchsizes.append(len(batch))
+        task = self._loop.run_in_executor(None, self._evaluate, key, batch)
+        task.add_done_callback(lambda t: self._resolve(t, batch))
+
+    def _evaluate(self, key, batch):
+        network, kind, variables, evvariables = key
+        evstates = np.array([b[1] for b in batch],
+                            dtype=int).reshape(len(batch), len(evvariables))
+        tables = batchcondpot(self.networks[network], variables, evvariables,
+                              evstates)
+        responses = []
+        for (rid, states, future), table in zip(batch, tables):
+            if kind == 'posterior':
+                responses.append({'id': rid, 'variables': list(variables),
+                                  'table': table.tolist()})
+            else:
+                best = np.unravel_index(np.argmax(table), table.shape)
+                responses.append({'id': rid, 'variables': list(variables),
+                                  'states': [int(s) for s in best],
+                                  'prob': float(table[best])})
+        return responses
+
+    def _resolve(self, task, batch):
+        error = task.exception()
+        for i, (rid, states, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_result({'id': rid, 'error': str(error)})
+            else:
+                future.set_result(task.result()[i])
+
+
+class InferenceClient:
+    """Blocking client for an InferenceServer (one request at a time)."""
+    def __init__(self, address, timeout=10.0):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address if isinstance(address, str)
+                          else tuple(address))
+        self.file = self.sock.makefile('rw')
+        self.nextid = 0
+
+    def request(self, request):
+        self.nextid += 1
+        request = dict(request, id=request.get('id', self.nextid))
+        self.file.write(json.dumps(request) + '\n')
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response
+
+    def posterior(self, network, variables, evidence=None):
+        """Return the posterior table of variables given evidence."""
+        r = self.request({'network': network, 'type': 'posterior',
+                          'variables': list(variables),
+                          'evidence': _evidence(evidence)})
+        return np.array(r['table'])
+
+    def map(self, network, variables, evidence=None):
+        """Return the most likely joint state of variables and its prob."""
+        r = self.request({'network': network, 'type': 'map',
+                          'variables': list(variables),
+                          'evidence': _evidence(evidence)})
+        return r['states'], r['prob']
+
+    def stats(self):
+        return self.request({'type': 'stats'})
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def _evidence(evidence):
+    return dict((str(int(v)), int(s)) for v, s in (evidence or {}).items())
@@ -11,16 +11,11 @@ import numpy as np
 import copy as copy
 from brml.potential import Potential
 from brml.ismember import ismember
-from brml.setstate import setstate
 from brml.intersect import intersect
-from brml.setstate import setstate
 from brml.setminus import setminus
-from brml.myzeros import myzeros
-from brml.multpots import multpots
-from brml.index_to_assignment import index_to_assignment
-from brml.assignment_to_index import assignment_to_index
-
+from brml.logger import traced
 
+@traced('setpot')
 def setpot(pot, evvariables, evidstates):
     #FIXME: data format needed to be unified
     vars = pot.variables
@@ -47,21 +42,19 @@ def setpot(pot, evvariables, evidstates):
     else:
         newvar = setminus(vars, intersection)
         dummy, idx = ismember(newvar, vars)
+        idx = np.asarray(idx, dtype=int)
         newns = nstates[idx]
         newpot = Potential()
         newpot.variables = newvar
         newpot.card = newns
-        newpot.table = np.zeros(newns)
-        #print("idx:", idx)
-        #print("iv:", iv)
-        for i in range(np.prod(newns)):
-            newassign = index_to_assignment(i, newns)
-            oldassign = np.zeros(nstates.size, 'int8')
-            oldassign[idx] = newassign
-            oldassign[iv] = evidstates
-            #print("newpot.table.shape:", newpot.table.shape)
-            #print("newassign:", newassign)
-            #print("newassign type:", type(newassign))
-            newpot.table[tuple(newassign)] = pot.table[tuple(oldassign)]
+        # index the evidential axes with their states; the remaining axes
+        # keep their order in vars and are then put in the order of newvar
+        states = np.asarray(evidstates).reshape(-1)
+        index = [slice(None)] * len(vars)
+        for i, j in zip(iv, iev):
+            index[i] = int(states[j])
+        rest = [i for i in range(len(vars)) if not isinstance(index[i], int)]
+        perm = np.searchsorted(rest, idx)
+        newpot.table = np.transpose(np.asarray(table)[tuple(index)], perm)
 
     return newpot
@@ -7,67 +7,67 @@ All states of the potential that match the given (sub)state are set to val
 eg: pot=array([1 2],rand(2,2);
 newpot=setstate(pot,1,2,0.5)
 then for newpot.table all table entries matching variable 1 in state 2 will be set to value 0.5
+
+Python:
+states may also be a K x len(vars) array of K (sub)states, in which case
+val is a scalar or has one value per row of states. Variables of vars that
+are not in the potential are ignored, a variable repeated in vars must have the
+same state every time (ValueError otherwise). The entries are written with one
+NumPy indexing operation; with inplace=True the table of pot itself is
+modified and pot is returned, otherwise pot is left unchanged.
 """
+import logging
 import numpy as np
 import copy as copy
-from brml.ismember import ismember
-from brml.subv2ind import subv2ind
-#from brml import *
+from brml.logger import traced
+
+log = logging.getLogger(__name__)
+
+
+@traced('setstate')
+def setstate(pot, vars, state, val, inplace=False):
+    vars = np.asarray(vars).reshape(-1)
+    state = np.asarray(state, dtype=np.intp)
+    batch = state.ndim == 2
+    state = state.reshape(-1, vars.size)
+    log.debug("vars= %s states= %s", vars, state)
+
+    potvars = list(np.asarray(pot.variables).reshape(-1))
+    mask = np.isin(vars, potvars)
+    vars = vars[mask]
+    state = state[:, mask]
+    # a variable given more than once must be given the same state
+    unique, first, inverse = np.unique(vars, return_index=True,
+                                       return_inverse=True)
+    conflict = np.any(state != state[:, first[inverse]], axis=0)
+    if conflict.any():
+        raise ValueError('variable %d is given different states'
+                         % vars[conflict][0])
+    keep = np.sort(first)
+    vars = vars[keep]
+    state = state[:, keep]
+    iperm = [potvars.index(v) for v in vars]
+    log.debug("effective vars' index in pot: %s", iperm)
 
-def setstate(pot,vars,state,val):
-#FIXME: data format needed to be unified
-#FIXME: works only for 1-D
-    vars = np.array([vars])
-    state = np.array([state])
-    print(type(vars))
-    print("original vars:", vars)
-    print("input state:", state)
-    p = copy.copy(pot)
-    a,tmp = ismember(vars,pot.variables)
-    print("tmp=", tmp)
-    vars = vars[tmp]
-    state = state[tmp]
-    print("effective vars:", vars)
-    dum,iperm = ismember(vars,pot.variables)
-    print("original vars item in pot:", pot.variables)
-    print("original table in pot", pot.table)
-    print("effective vars' index in pot:", iperm)
-#FIXME: not consistent with former definition (need fn_size)
-    nstates = pot.table.shape
-#FIXME: arbitrary setting
-    nstates = np.array([2])
-    print("effective vars in pot NSTATES:", nstates)
-#NOTE: use NAN as initial state in Python instead of 0. (Different from MATLAB)
-    permstates = np.empty((1,np.size(nstates)))
-#FIXME: arbitrary setting
-    permstates = np.empty(1)
-    permstates[:] = np.nan
-    print("initial effective vars states: \n", permstates)
-    permstates[iperm] = state
-    print("set effective vars states: \n", permstates)
-    # set effective var-states to val
-    print("permstates=", permstates)
-    print("permstates.all()=", permstates.all())
-    # MATLAB: if all(permstates>0) % if the state is unique
-    allcondition = np.logical_not(np.isnan(permstates)).all()
-    print("allcondition=", allcondition)
-    if allcondition: # if the state is unique
-        print("Before setstate: p.table= \n", p.table)
-        watch_ndx = np.asarray([subv2ind(nstates,permstates)])
-        watch_ndx = np.int8(watch_ndx)
-        print("Callback watch_ndx = subv2ind(nstates,permstates)=", watch_ndx)
-#FIXME: data format need unified
-#p.table[subv2ind(nstates,permstates)] = val
-        #p.table = p.table.reshape(1,2)
-        #print("reshaped p.table: \n", p.table)
-        print("val= ", val)
-        p.table[watch_ndx] = val
-        #p.table = p.table.reshape(2,1)
-        print("After setstate: p.table= \n", p.table)
-#FIXME: not implemented ELSE case
-#	else : # set all states that match the given substate to the given value
-#		sub=find(permstates>0);
-#		st=ind2subv(nstates,1:prod(nstates));
-#		p.table(all(st(:,sub)==repmat(permstates(sub),prod(nstates),1),2))=val;
+    if inplace:
+        p = pot
+    else:
+        p = copy.copy(pot)
+        p.table = np.array(pot.table, copy=True)
+    if not iperm:
+        # the (sub)state does not constrain the potential: set everything
+        p.table[...] = val
+        return p
 
+    # a view with the axes of the given variables first, so that the K
+    # substates index its leading axes and every entry matching them is
+    # set by the same write
+    view = np.moveaxis(p.table, iperm, range(len(iperm)))
+    val = np.asarray(val)
+    if batch and val.ndim == 1:
+        val = val.reshape((-1,) + (1,) * (view.ndim - len(iperm)))
+    elif not batch:
+        state = state[0]
+    view[tuple(state.T)] = val
+    log.debug("After setstate: p.table= \n%s", p.table)
     return p
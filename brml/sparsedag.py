@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+
+
+class SparseDAG:
+    """
+    Directed acyclic graph stored as compressed sparse rows: the parents of
+    node i are paidx[paptr[i]:paptr[i+1]] and its children are
+    chidx[chptr[i]:chptr[i+1]]. Memory is O(N + E) and the dense adjacency
+    matrix is only built on request by todense(). The topological order is
+    computed once and cached.
+    """
+    def __init__(self, N, parent, child):
+        """
+        N: number of nodes (0..N-1)
+        parent, child: array_like of the same length, one entry per edge
+        parent[e] -> child[e]
+        """
+        parent = np.asarray(parent, dtype=np.intp).reshape(-1)
+        child = np.asarray(child, dtype=np.intp).reshape(-1)
+        keep = parent != child
+        edges = np.unique(np.column_stack([parent[keep], child[keep]]),
+                          axis=0)
+        self.N = int(N)
+        self.paptr, self.paidx = _csr(self.N, edges[:, 1], edges[:, 0])
+        self.chptr, self.chidx = _csr(self.N, edges[:, 0], edges[:, 1])
+        self._order = None
+
+    @classmethod
+    def frompots(cls, pot):
+        """
+        Build the graph of a Belief Network in which every potential is
+        p(v|pa(v)) with v its first variable and pa(v) the others.
+        """
+        parent, child = [], []
+        N = 0
+        for p in pot:
+            variables = np.asarray(p.variables, dtype=np.intp).reshape(-1)
+            if variables.size == 0:
+                continue
+            N = max(N, int(variables.max()) + 1)
+            parent.append(variables[1:])
+            child.append(np.repeat(variables[0], variables.size - 1))
+        if not parent:
+            return cls(N, [], [])
+        return cls(N, np.concatenate(parent), np.concatenate(child))
+
+    @classmethod
+    def fromdense(cls, A):
+        """Build the graph from an adjacency matrix, A[i, j] != 0 if i -> j."""
+        A = np.asarray(A)
+        parent, child = np.nonzero(A)
+        return cls(A.shape[0], parent, child)
+
+    def nedges(self):
+        return int(self.paidx.size)
+
+    def parents(self, i):
+        return self.paidx[self.paptr[i]:self.paptr[i + 1]]
+
+    def children(self, i):
+        return self.chidx[self.chptr[i]:self.chptr[i + 1]]
+
+    def markovblanket(self, i):
+        """Parents, children and the children's other parents of node i."""
+        ch = self.children(i)
+        mb = np.concatenate([self.parents(i), ch,
+                             _gather(self.paptr, self.paidx, ch)])
+        mb = np.unique(mb)
+        return mb[mb != i]
+
+    def ancestors(self, nodes):
+        """Ancestors of the given nodes, excluding the nodes themselves."""
+        return self._closure(self.paptr, self.paidx, nodes)
+
+    def descendants(self, nodes):
+        """Descendants of the given nodes, excluding the nodes themselves."""
+        return self._closure(self.chptr, self.chidx, nodes)
+
+    def _closure(self, ptr, idx, nodes):
+        nodes = np.asarray(nodes, dtype=np.intp).reshape(-1)
+        seen = np.zeros(self.N, dtype=bool)
+        frontier = nodes
+        while frontier.size:
+            nxt = np.unique(_gather(ptr, idx, frontier))
+            frontier = nxt[~seen[nxt]]
+            seen[frontier] = True
+        seen[nodes] = False
+        return np.nonzero(seen)[0]
+
+    def toporder(self):
+        """
+        A topological order of the nodes (parents before children), computed
+        level by level with Kahn's algorithm and cached.
+        """
+        if self._order is None:
+            indegree = np.diff(self.paptr)
+            frontier = np.nonzero(indegree == 0)[0]
+            order = []
+            while frontier.size:
+                order.append(frontier)
+                ch = _gather(self.chptr, self.chidx, frontier)
+                indegree = indegree - np.bincount(ch, minlength=self.N)
+                frontier = np.unique(ch[indegree[ch] == 0])
+            order = np.concatenate(order) if order else np.array([], np.intp)
+            if order.size != self.N:
+                raise ValueError('graph has a directed cycle')
+            self._order = order
+        return self._order
+
+    def todense(self):
+        """Dense adjacency matrix, A[i, j] = 1 if i is a parent of j."""
+        A = np.zeros((self.N, self.N))
+        child = np.repeat(np.arange(self.N), np.diff(self.paptr))
+        A[self.paidx, child] = 1
+        return A
+
+
+def _csr(N, row, col):
+    order = np.lexsort((col, row))
+    ptr = np.zeros(N + 1, dtype=np.intp)
+    ptr[1:] = np.cumsum(np.bincount(row, minlength=N))
+    return ptr, np.asarray(col, dtype=np.intp)[order]
+
+
+def _gather(ptr, idx, nodes):
+    """Concatenation of idx[ptr[n]:ptr[n+1]] for all n in nodes."""
+    nodes = np.asarray(nodes, dtype=np.intp)
+    start = ptr[nodes]
+    length = ptr[nodes + 1] - start
+    total = int(length.sum())
+    if total == 0:
+        return np.array([], dtype=np.intp)
+    offset = np.repeat(start - np.cumsum(length) + length, length)
+    return idx[offset + np.arange(total)]
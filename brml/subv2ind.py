@@ -8,17 +8,19 @@
 % corresponding row of ndx. 
 % This function is the inverse of ind2subv.m
 """
+import logging
 import numpy as np
+
+log = logging.getLogger(__name__)
+
 #FIXME: not quite clear about this function
 def subv2ind(siz,sub):
-    print("siz=", siz)
-    print("sub=", sub)
+    log.debug("siz= %s sub= %s", siz, sub)
     k = np.array([0])
-    print("k=", k)
     k = np.append(k, np.cumprod(siz[0:-1]))
-    print("k=", k)
+    log.debug("k= %s", k)
 # MATLAB:     ndx=sub*k.T-k.sum()+1
     ndx=sub*k.T-k.sum()
-    print("ndx=", ndx)
+    log.debug("ndx= %s", ndx)
 
     return ndx
\ No newline at end of file
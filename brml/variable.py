@@ -1,10 +1,6 @@
 #!/usr/bin/env python
 
 "Basic Class: variable"
-if __name__ == '__main__':
-    print('VariableClass is running by itself')
-else:
-    print('VariableClass is imported as module')
 
 class Variable:
     def __init__(self, name = [], domain= []):
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+import brml.chunked as chunked
+from brml.chunked import multiply, sumout
+from brml.potential import Potential
+from brml.condpot import condpot
+import numpy as np
+
+
+class chunkedTestCase(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.a = rng.rand(3, 1, 4, 5)
+        self.b = rng.rand(1, 6, 4, 1)
+        self.options = dict(chunked.options)
+        chunked.setthreads(4, mincells=1)
+
+    def tearDown(self):
+        chunked.options.update(self.options)
+
+    def testMultiply(self):
+        assert np.allclose(multiply(self.a, self.b), self.a * self.b)
+        assert np.allclose(multiply(self.b, self.a, threads=3),
+                           self.a * self.b)
+
+    def testSumout(self):
+        t = self.a * self.b
+        for axes in [(0,), (1, 3), (0, 2), (0, 1, 2, 3), ()]:
+            assert np.allclose(sumout(t, axes), np.sum(t, axis=axes))
+
+    def testBlocks(self):
+        # a few contiguous slabs, not one block per outer index
+        blocks = chunked._blocks((100000, 1, 100), 10 ** 7, 4)
+        self.assertEqual(len(blocks), 16)
+        blocks = chunked._blocks((3, 5, 7), 105, 4)
+        self.assertLessEqual(len(blocks), 2 * 16)
+        covered = np.zeros((3, 5, 7), int)
+        for idx in blocks:
+            covered[idx] += 1
+        assert np.all(covered == 1)
+        rng = np.random.RandomState(1)
+        a = rng.rand(1000, 1, 3)
+        b = rng.rand(1, 7, 3)
+        assert np.allclose(multiply(a, b), a * b)
+        assert np.allclose(sumout(a * b, (1,)), np.sum(a * b, axis=1))
+        assert np.allclose(sumout(a * b, (0, 2)), np.sum(a * b, axis=(0, 2)))
+
+    def testPotential(self):
+        p = Potential(np.array([0, 2]), np.array([3, 4]),
+                      self.a.reshape(3, 4, 5)[:, :, 0])
+        q = Potential(np.array([2, 1]), np.array([4, 6]),
+                      self.b.reshape(6, 4).T)
+        r = p * q
+        assert np.allclose(r.variables, [0, 1, 2])
+        answer = np.einsum('ik,kj->ijk', p.table, q.table)
+        assert np.allclose(r.table, answer)
+        m = condpot(r, np.array([2, 0]))
+        assert np.allclose(m.variables, [0, 2])
+        assert np.allclose(m.table, answer.sum(axis=1) / answer.sum())
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(chunkedTestCase("testMultiply"))
+    suite.addTest(chunkedTestCase("testSumout"))
+    suite.addTest(chunkedTestCase("testBlocks"))
+    suite.addTest(chunkedTestCase("testPotential"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
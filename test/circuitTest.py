@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.circuit import ArithmeticCircuit
+from brml.parallel import query
+from brml.jtree import JunctionTree
+from helpers import randomnet
+import numpy as np
+
+
+class circuitTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = randomnet(10, 3, 3)
+        self.ac = ArithmeticCircuit(self.pot)
+
+    def testProbEvidence(self):
+        self.assertAlmostEqual(self.ac.probevidence()[0], 1.0)
+        jt = JunctionTree(self.pot)
+        jt.setevidence(9, 1)
+        jt.setevidence(2, 0)
+        pe = self.ac.probevidence({9: 1, 2: 0})
+        self.assertAlmostEqual(np.log(pe[0]), jt.logprobevidence())
+
+    def testMarginals(self):
+        evidence = {9: [1, 0, -1, 2], 4: [2, -1, -1, 0]}
+        post = self.ac.marginals(evidence)
+        for b in range(4):
+            ev = [v for v in evidence if evidence[v][b] >= 0]
+            st = [evidence[v][b] for v in ev]
+            for v in (0, 3, 7):
+                expected = query(self.pot, [v], ev, st).table
+                np.testing.assert_allclose(post[v][b], expected)
+        # an observed variable gets its posterior given the other evidence
+        expected = query(self.pot, [9], [4], [2]).table
+        np.testing.assert_allclose(post[9][0], expected)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(circuitTestCase("testProbEvidence"))
+    suite.addTest(circuitTestCase("testMarginals"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.cutset import cutsetquery, loopcutset, Conditioner
+from brml.parallel import query
+from brml.potential import Potential
+from helpers import randomnet
+import numpy as np
+
+
+def isforest(pot, cutset):
+    # the factor graph without the cutset has one edge less than nodes in
+    # every component: count nodes, edges and components
+    scopes = [set(int(v) for v in p.variables) - set(cutset) for p in pot]
+    variables = set().union(*scopes)
+    edges = sum(len(s) for s in scopes)
+    parent = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            x = parent[x]
+        return x
+    for i, s in enumerate(scopes):
+        for v in s:
+            parent[find(('v', v))] = find(('f', i))
+    nodes = len(variables) + len(scopes)
+    roots = set(find(('v', v)) for v in variables) | \
+        set(find(('f', i)) for i in range(len(scopes)))
+    return edges == nodes - len(roots)
+
+
+class cutsetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = randomnet(12, 3, 2)
+
+    def testCutset(self):
+        cutset = loopcutset(self.pot)
+        self.assertTrue(len(cutset) > 0)
+        self.assertTrue(isforest(self.pot, cutset))
+
+    def testQuery(self):
+        ev, states = [11, 4], [1, 2]
+        for q in ([0], [5, 7], [6]):
+            expected = query(self.pot, q, ev, states)
+            for budget in (0, 2 ** 20):
+                result = cutsetquery(self.pot, q, ev, states, budget=budget)
+                np.testing.assert_allclose(result.table, expected.table)
+        # a query variable in the cutset
+        cutset = loopcutset(self.pot)
+        result = cutsetquery(self.pot, cutset[:1], cutset=cutset)
+        expected = query(self.pot, cutset[:1])
+        np.testing.assert_allclose(result.table, expected.table)
+
+    def testCache(self):
+        cutset = loopcutset(self.pot)
+        card = dict((int(p.variables[0]), 3) for p in self.pot)
+        c = Conditioner(self.pot, [0], cutset, card, 2 ** 20)
+        c.chunk(0, 3 ** len(cutset))
+        self.assertTrue(c.hits > 0)
+        c = Conditioner(self.pot, [0], cutset, card, 0)
+        c.chunk(0, 3 ** len(cutset))
+        self.assertEqual(c.hits, 0)
+        self.assertEqual(c.cachebytes, 0)
+
+    def testImpossibleEvidence(self):
+        # a potential whose variables are all observed is a constant
+        pot = [p for p in self.pot]
+        zero = [i for i, p in enumerate(pot) if p.variables.size == 1][0]
+        v = int(pot[zero].variables[0])
+        pot[zero] = Potential(pot[zero].variables, pot[zero].card,
+                              np.array([0.0, 0.5, 0.5]))
+        result = cutsetquery(pot, [5], [v], [0])
+        np.testing.assert_array_equal(result.table, np.zeros(3))
+        # every instantiation of the cutset has probability zero
+        pot = [Potential(np.array([0]), np.array([2]), np.array([0.5, 0.5])),
+               Potential(np.array([1, 0]), np.array([2, 2]),
+                         np.array([[0.0, 0.0], [1.0, 1.0]]))]
+        result = cutsetquery(pot, [0], [1], [0], cutset=[0])
+        np.testing.assert_array_equal(result.table, np.zeros(2))
+
+    def testObservedQuery(self):
+        ev, states = [4, 11], [2, 1]
+        result = cutsetquery(self.pot, [0, 4], ev, states)
+        self.assertEqual(list(result.variables), [0, 4])
+        expected = query(self.pot, [0], ev, states)
+        np.testing.assert_allclose(result.table[:, 2], expected.table)
+        np.testing.assert_array_equal(result.table[:, :2], 0)
+
+    def testWorkers(self):
+        expected = query(self.pot, [3], [10], [0])
+        result = cutsetquery(self.pot, [3], [10], [0], workers=2)
+        np.testing.assert_allclose(result.table, expected.table)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(cutsetTestCase("testCutset"))
+    suite.addTest(cutsetTestCase("testQuery"))
+    suite.addTest(cutsetTestCase("testCache"))
+    suite.addTest(cutsetTestCase("testImpossibleEvidence"))
+    suite.addTest(cutsetTestCase("testObservedQuery"))
+    suite.addTest(cutsetTestCase("testWorkers"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Networks shared by the tests."""
+from brml.potential import Potential
+import numpy as np
+
+
+def pot(variables, table):
+    # potential on variables; the card is read from the last axes of table,
+    # so a stack of tables may have extra leading axes
+    p = Potential()
+    p.variables = np.array(variables, dtype=int)
+    p.table = np.asarray(table, dtype=float)
+    p.card = np.array(p.table.shape[p.table.ndim - len(p.variables):])
+    return p
+
+
+def randomnet(N, nstates, seed):
+    # chain-like network, node i has up to two earlier parents
+    rng = np.random.RandomState(seed)
+    pot = []
+    for i in range(N):
+        parents = sorted(set(rng.randint(max(i - 3, 0), i, size=2))) \
+            if i > 0 else []
+        p = Potential()
+        p.variables = np.array([i] + parents)
+        p.card = np.array([nstates] * p.variables.size)
+        table = rng.rand(*p.card)
+        p.table = table / table.sum(axis=0)
+        pot.append(p)
+    return pot
+
+
+def burglarnet():
+    # the demoBurglar network (burglar, earthquake, alarm, radio)
+    burglar, earthquake, alarm, radio = range(4)
+    yes, no = 0, 1
+    pot = [Potential() for i in range(4)]
+    pot[burglar].variables = np.array([burglar])
+    pot[burglar].card = np.array([2])
+    pot[burglar].table = np.array([0.01, 0.99])
+    pot[earthquake].variables = np.array([earthquake])
+    pot[earthquake].card = np.array([2])
+    pot[earthquake].table = np.array([0.000001, 0.999999])
+    table = np.zeros((2, 2, 2))
+    table[yes, yes, yes] = 0.9999
+    table[yes, yes, no] = 0.99
+    table[yes, no, yes] = 0.99
+    table[yes, no, no] = 0.0001
+    table[no] = 1 - table[yes]
+    pot[alarm].variables = np.array([alarm, burglar, earthquake])
+    pot[alarm].card = np.array([2, 2, 2])
+    pot[alarm].table = table
+    pot[radio].variables = np.array([radio, earthquake])
+    pot[radio].card = np.array([2, 2])
+    pot[radio].table = np.array([[1.0, 0.0], [0.0, 1.0]])
+    return pot
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import itertools
+import sys
+sys.path.append("..")
+from brml.hmm import HMM
+from brml.jtree import JunctionTree
+from helpers import pot
+import numpy as np
+
+
+def normalised(table):
+    return table / table.sum(axis=0)
+
+
+class hmmTestCase(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.A = normalised(rng.rand(3, 3))
+        self.B = normalised(rng.rand(4, 3))
+        self.pi = normalised(rng.rand(3))
+        self.model = HMM(pot([0], self.pi), pot([1, 0], self.A),
+                         pot([2, 0], self.B))
+        self.obs = rng.randint(0, 4, size=(2, 6))
+        self.obs[1, 2] = -1
+
+    def joint(self, obs):
+        T = len(obs)
+        joint = np.zeros((3,) * T)
+        for hs in itertools.product(range(3), repeat=T):
+            p = self.pi[hs[0]]
+            for t in range(1, T):
+                p *= self.A[hs[t], hs[t - 1]]
+            for t in range(T):
+                if obs[t] >= 0:
+                    p *= self.B[obs[t], hs[t]]
+            joint[hs] = p
+        return joint
+
+    def testForwardBackward(self):
+        logalpha, logbeta, loggamma, loglik = \
+            self.model.forwardbackward(self.obs)
+        for n in range(2):
+            joint = self.joint(self.obs[n])
+            self.assertAlmostEqual(loglik[n], np.log(joint.sum()))
+            for t in range(6):
+                axes = tuple(i for i in range(6) if i != t)
+                gamma = joint.sum(axis=axes)
+                np.testing.assert_allclose(np.exp(loggamma[n, t]),
+                                           gamma / gamma.sum())
+
+    def testFilter(self):
+        logalpha = self.model.forwardbackward(self.obs[:1])[0][0]
+        filtered = [a for a, l in self.model.filter(iter(self.obs[0]))]
+        np.testing.assert_allclose(np.array(filtered), logalpha)
+
+    def testFixedLag(self):
+        lag = 2
+        smoothed = dict(self.model.smooth(iter(self.obs[0]), lag))
+        self.assertEqual(sorted(smoothed), list(range(6)))
+        for t in range(6):
+            obs = self.obs[0].copy()
+            obs[t + lag + 1:] = -1
+            loggamma = self.model.forwardbackward(obs[None])[2][0]
+            np.testing.assert_allclose(smoothed[t], loggamma[t])
+
+    def testLengths(self):
+        padded = np.hstack([self.obs, [[1, 1], [1, 1]]])
+        loglik = self.model.forwardbackward(padded, lengths=[6, 6])[3]
+        expected = self.model.forwardbackward(self.obs)[3]
+        np.testing.assert_allclose(loglik, expected)
+
+    def testDBN(self):
+        # two coupled binary chains a, b observed through v, two slices
+        rng = np.random.RandomState(1)
+        a1, b1, a2, b2, v1, v2 = range(6)
+        prior = [pot([a1], normalised(rng.rand(2))),
+                 pot([b1, a1], normalised(rng.rand(2, 2)))]
+        ta = normalised(rng.rand(2, 2))
+        tb = normalised(rng.rand(2, 2, 2))
+        emit = normalised(rng.rand(3, 2, 2))
+        transition = [pot([a2, a1], ta), pot([b2, b1, a2], tb)]
+        model = HMM.fromdbn(prior, transition, [pot([v1, a1, b1], emit)],
+                            [a1, b1], [a2, b2])
+        loggamma = model.forwardbackward([[2, 0]])[2][0]
+        net = prior + transition + [pot([v1, a1, b1], emit),
+                                    pot([v2, a2, b2], emit)]
+        jt = JunctionTree(net)
+        jt.setevidence(v1, 2)
+        jt.setevidence(v2, 0)
+        expected = jt.marginal([a2, b2]).table.reshape(-1)
+        np.testing.assert_allclose(np.exp(loggamma[1]), expected)
+
+    def testViterbi(self):
+        path, logprob = self.model.viterbi(self.obs, checkpoint=2)
+        for n in range(2):
+            joint = self.joint(self.obs[n])
+            best = np.unravel_index(np.argmax(joint), joint.shape)
+            np.testing.assert_array_equal(path[n], best)
+            self.assertAlmostEqual(logprob[n], np.log(joint.max()))
+
+    def testViterbiCheckpoint(self):
+        rng = np.random.RandomState(2)
+        obs = rng.randint(-1, 4, size=(3, 500))
+        lengths = [500, 321, 7]
+        full, logfull = self.model.viterbi(obs, lengths, checkpoint=500)
+        for c in (None, 1, 13):
+            path, logprob = self.model.viterbi(obs, lengths, checkpoint=c)
+            np.testing.assert_array_equal(path, full)
+            np.testing.assert_allclose(logprob, logfull)
+        short, logshort = self.model.viterbi(obs[2:, :7])
+        np.testing.assert_array_equal(full[2, :7], short[0])
+        np.testing.assert_allclose(logfull[2], logshort[0])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(hmmTestCase("testForwardBackward"))
+    suite.addTest(hmmTestCase("testFilter"))
+    suite.addTest(hmmTestCase("testFixedLag"))
+    suite.addTest(hmmTestCase("testLengths"))
+    suite.addTest(hmmTestCase("testDBN"))
+    suite.addTest(hmmTestCase("testViterbi"))
+    suite.addTest(hmmTestCase("testViterbiCheckpoint"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
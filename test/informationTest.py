@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.information import entropy, condentropy, mutualinformation, \
+    kldivergence
+from helpers import pot
+import numpy as np
+
+
+def H(p):
+    p = p[p > 0]
+    return -np.sum(p * np.log(p))
+
+
+class informationTestCase(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.tables = rng.rand(50, 2, 3, 4)
+        self.tables[:, 0, 1, :] = 0.0
+        self.tables /= self.tables.sum(axis=(1, 2, 3), keepdims=True)
+        self.stack = pot([5, 2, 9], self.tables)
+
+    def testEntropy(self):
+        t = self.tables[7]
+        self.assertAlmostEqual(entropy(pot([5, 2, 9], t)), H(t))
+        self.assertAlmostEqual(entropy(pot([5, 2, 9], t), [2]),
+                               H(t.sum(axis=(0, 2))))
+        values = entropy(self.stack, [5, 9])
+        self.assertEqual(values.shape, (50,))
+        self.assertAlmostEqual(values[7], H(t.sum(axis=1)))
+
+    def testCondEntropyMI(self):
+        t = self.tables[3]
+        hxy = H(t.sum(axis=2))
+        hx, hy = H(t.sum(axis=(1, 2))), H(t.sum(axis=(0, 2)))
+        self.assertAlmostEqual(condentropy(self.stack, [5], [2])[3], hxy - hy)
+        self.assertAlmostEqual(mutualinformation(self.stack, 5, 2)[3],
+                               hx + hy - hxy)
+        # independent variables
+        indep = pot([0, 1], np.outer([0.3, 0.7], [0.1, 0.5, 0.4]))
+        self.assertAlmostEqual(mutualinformation(indep, [0], [1]), 0.0)
+
+    def testKL(self):
+        p = pot([0, 1], [[0.5, 0.0], [0.25, 0.25]])
+        q = pot([1, 0], [[0.25, 0.25], [0.25, 0.25]])
+        expected = 0.5 * np.log(2) + 0.5 * np.log(1)
+        self.assertAlmostEqual(kldivergence(p, q), expected)
+        self.assertEqual(kldivergence(q, p), np.inf)
+        self.assertAlmostEqual(kldivergence(p, p), 0.0)
+        values = kldivergence([p, q], q)
+        np.testing.assert_allclose(values, [expected, 0.0])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(informationTestCase("testEntropy"))
+    suite.addTest(informationTestCase("testCondEntropyMI"))
+    suite.addTest(informationTestCase("testKL"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.jtree import JunctionTree
+from brml.parallel import query
+from brml.multpots import multpots
+from helpers import randomnet
+import numpy as np
+
+
+class jtreeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = randomnet(12, 3, 0)
+
+    def testMarginals(self):
+        jt = JunctionTree(self.pot)
+        evvariables, evstates = [], []
+        for v, s in [(11, 2), (3, 0), (7, 1)]:
+            jt.setevidence(v, s)
+            evvariables.append(v)
+            evstates.append(s)
+            for q in (0, 5, 9):
+                expected = query(self.pot, [q], evvariables, evstates)
+                np.testing.assert_allclose(jt.marginal(q).table,
+                                           expected.table)
+        jt.retract(3)
+        expected = query(self.pot, [0], [11, 7], [2, 1])
+        np.testing.assert_allclose(jt.marginal(0).table, expected.table)
+
+    def testProbEvidence(self):
+        jt = JunctionTree(self.pot)
+        jt.setevidence(4, 1)
+        jt.setevidence(10, 0)
+        joint = multpots(self.pot)
+        idx = [slice(None)] * 12
+        idx[4], idx[10] = 1, 0
+        expected = np.log(np.sum(joint.table[tuple(idx)]))
+        self.assertAlmostEqual(jt.logprobevidence(), expected)
+
+    def testLocalUpdate(self):
+        jt = JunctionTree(self.pot)
+        for c in range(len(jt.cliques)):
+            jt.belief(c)
+        cached = len(jt._messages)
+        jt.setevidence(11, 0)
+        # only the messages leaving the home clique of 11 are discarded
+        self.assertEqual(len(jt._messages),
+                         cached - len(jt._away[jt.home[11]]))
+        self.assertTrue(len(jt._messages) > 0)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(jtreeTestCase("testMarginals"))
+    suite.addTest(jtreeTestCase("testProbEvidence"))
+    suite.addTest(jtreeTestCase("testLocalUpdate"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
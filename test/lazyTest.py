@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml import lazy
+from brml.parallel import query
+from brml.potential import Potential
+from brml.jtree import JunctionTree
+from helpers import randomnet
+import numpy as np
+
+
+class lazyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = randomnet(10, 3, 7)
+
+    def testQuery(self):
+        expr = lazy.condpot(lazy.setpot(lazy.multpots(self.pot), [9, 2],
+                                        [1, 0]), [4, 6])
+        result = expr.evaluate()
+        expected = query(self.pot, [4, 6], [9, 2], [1, 0])
+        np.testing.assert_array_equal(result.variables, [4, 6])
+        np.testing.assert_allclose(result.table, expected.table)
+
+    def testScope(self):
+        # variable 1 summed out on the left is not the 1 on the right
+        a, b = self.pot[1], self.pot[3]
+        expr = (lazy.lazy(a).sumout([1]) * lazy.lazy(b)).setpot([1], [2])
+        result = expr.evaluate()
+        left = np.sum(a.table, axis=0)
+        vs = list(b.variables)
+        right = np.take(b.table, 2, axis=vs.index(1))
+        rvars = [v for v in vs if v != 1]
+        self.assertEqual(list(result.variables),
+                         sorted(set([int(v) for v in a.variables[1:]]) |
+                                set(rvars)))
+        joint = (Potential(np.array(a.variables[1:]),
+                           np.array(left.shape), left) *
+                 Potential(np.array(rvars), np.array(right.shape), right))
+        np.testing.assert_allclose(result.table, joint.table)
+
+    def testManyIndices(self):
+        pot = randomnet(60, 2, 1)
+        expr = lazy.condpot(lazy.setpot(pot, [59], [0]), [30])
+        expected = lazy.condpot(lazy.setpot(pot[:31], [], []), [30])
+        result = expr.evaluate()
+        jt = JunctionTree(pot)
+        jt.setevidence(59, 0)
+        np.testing.assert_allclose(result.table, jt.marginal(30).table)
+        # without evidence the descendants of 30 sum to one
+        np.testing.assert_allclose(
+            lazy.condpot(pot, [30]).evaluate().table,
+            expected.evaluate().table)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(lazyTestCase("testQuery"))
+    suite.addTest(lazyTestCase("testScope"))
+    suite.addTest(lazyTestCase("testManyIndices"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
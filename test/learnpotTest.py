@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.learnpot import learnpot
+from brml.count import count
+from brml.potential import Potential
+import numpy as np
+
+
+class learnpotTestCase(unittest.TestCase):
+    def setUp(self):
+        # p(0) p(1|0) p(2|0,1)
+        self.pot = [Potential() for i in range(3)]
+        self.pot[0].variables = np.array([0])
+        self.pot[0].card = np.array([2])
+        self.pot[1].variables = np.array([1, 0])
+        self.pot[1].card = np.array([3, 2])
+        self.pot[2].variables = np.array([2, 0, 1])
+        self.pot[2].card = np.array([2, 2, 3])
+        rng = np.random.RandomState(0)
+        self.data = np.column_stack([rng.randint(0, 2, 500),
+                                     rng.randint(0, 3, 500),
+                                     rng.randint(0, 2, 500)])
+
+    def tearDown(self):
+        self.pot = None
+        self.data = None
+
+    def testCount(self):
+        c = count(self.data, [2, 3, 2], [1, 0])
+        self.assertEqual(c.shape, (3, 2))
+        for s1 in range(3):
+            for s0 in range(2):
+                self.assertEqual(c[s1, s0], np.sum((self.data[:, 1] == s1) &
+                                                   (self.data[:, 0] == s0)))
+
+    def testML(self):
+        newpot = learnpot(self.pot, self.data)
+        d = self.data
+        assert np.allclose(newpot[0].table, [np.mean(d[:, 0] == 0),
+                                             np.mean(d[:, 0] == 1)])
+        sel = (d[:, 0] == 1) & (d[:, 1] == 2)
+        assert np.allclose(newpot[2].variables, [2, 0, 1])
+        assert np.allclose(newpot[2].table[:, 1, 2],
+                           [np.mean(d[sel, 2] == 0), np.mean(d[sel, 2] == 1)])
+        for p in newpot:
+            assert np.allclose(p.table.sum(axis=0), 1)
+
+    def testBDeu(self):
+        newpot = learnpot(self.pot, np.array([[0, 1, 0]]), method='BDeu',
+                          ess=6.0)
+        # one observation (0, 1, 0) plus pseudo count 6/12 for p(2|0,1)
+        assert np.allclose(newpot[2].table[:, 0, 1], [1.5 / 2, 0.5 / 2])
+        assert np.allclose(newpot[2].table[:, 1, 2], [0.5, 0.5])
+
+    def testChunks(self):
+        chunks = (self.data[i:i + 64] for i in range(0, 500, 64))
+        newpot = learnpot(self.pot, chunks, nstates=[2, 3, 2])
+        answer = learnpot(self.pot, self.data)
+        for p, q in zip(newpot, answer):
+            assert np.allclose(p.table, q.table)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(learnpotTestCase("testCount"))
+    suite.addTest(learnpotTestCase("testML"))
+    suite.addTest(learnpotTestCase("testBDeu"))
+    suite.addTest(learnpotTestCase("testChunks"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.learnpotem import learnpotem
+from brml.learnpot import learnpot
+from brml.potential import Potential
+import numpy as np
+
+
+class learnpotemTestCase(unittest.TestCase):
+    def setUp(self):
+        # p(0) p(1|0) p(2|1)
+        self.pot = [Potential() for i in range(3)]
+        self.pot[0].variables = np.array([0])
+        self.pot[0].card = np.array([2])
+        self.pot[0].table = np.array([0.3, 0.7])
+        self.pot[1].variables = np.array([1, 0])
+        self.pot[1].card = np.array([2, 2])
+        self.pot[1].table = np.array([[0.9, 0.2], [0.1, 0.8]])
+        self.pot[2].variables = np.array([2, 1])
+        self.pot[2].card = np.array([3, 2])
+        self.pot[2].table = np.array([[0.6, 0.1], [0.3, 0.2], [0.1, 0.7]])
+
+        rng = np.random.RandomState(1)
+        n = 4000
+        x0 = (rng.rand(n) > 0.3).astype(int)
+        x1 = (rng.rand(n) > self.pot[1].table[0, x0]).astype(int)
+        cum = np.cumsum(self.pot[2].table[:, x1], axis=0)
+        x2 = (rng.rand(n) > cum).sum(axis=0)
+        self.data = np.column_stack([x0, x1, x2])
+
+    def tearDown(self):
+        self.pot = None
+        self.data = None
+
+    def testComplete(self):
+        newpot, loglik = learnpotem(self.pot, self.data, maxit=3)
+        answer = learnpot(self.pot, self.data)
+        for p, q in zip(newpot, answer):
+            assert np.allclose(p.table, q.table)
+
+    def testMissing(self):
+        rng = np.random.RandomState(2)
+        data = self.data.copy()
+        data[rng.rand(*data.shape) < 0.3] = -1
+        newpot, loglik = learnpotem(self.pot, data, warmstart=False, seed=0,
+                                    maxit=200, tol=1e-10)
+        assert np.all(np.diff(loglik) > -1e-8)
+        assert np.allclose(newpot[0].table, self.pot[0].table, atol=0.05)
+        assert np.allclose(newpot[2].table, self.pot[2].table, atol=0.05)
+
+    def testMaxit(self):
+        self.assertRaises(ValueError, learnpotem, self.pot, self.data,
+                          maxit=0)
+        newpot, loglik = learnpotem(self.pot, self.data, maxit=1)
+        self.assertEqual(len(loglik), 1)
+
+    def testWorkers(self):
+        data = self.data.copy()
+        data[::3, 1] = -1
+        data[1::5, 0] = -1
+        newpot, loglik = learnpotem(self.pot, data, maxit=5)
+        answer, answerlik = learnpotem(self.pot, data, maxit=5, workers=2)
+        assert np.allclose(loglik, answerlik)
+        for p, q in zip(newpot, answer):
+            assert np.allclose(p.table, q.table)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(learnpotemTestCase("testComplete"))
+    suite.addTest(learnpotemTestCase("testMissing"))
+    suite.addTest(learnpotemTestCase("testMaxit"))
+    suite.addTest(learnpotemTestCase("testWorkers"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.learnstructure import learnstructure, reachability
+import numpy as np
+
+
+class learnstructureTestCase(unittest.TestCase):
+    def setUp(self):
+        # chain 0 -> 1 -> 2 and an independent variable 3
+        rng = np.random.RandomState(0)
+        n = 3000
+        x0 = rng.randint(0, 2, n)
+        x1 = np.where(rng.rand(n) < 0.9, x0, 1 - x0)
+        x2 = np.where(rng.rand(n) < 0.85, x1, 1 - x1)
+        x3 = rng.randint(0, 3, n)
+        self.data = np.column_stack([x0, x1, x2, x3])
+        self.nstates = [2, 2, 2, 3]
+
+    def tearDown(self):
+        self.data = None
+
+    def assertSkeleton(self, A):
+        S = ((A + A.T) > 0).astype(int)
+        answer = np.array([[0, 1, 0, 0],
+                           [1, 0, 1, 0],
+                           [0, 1, 0, 0],
+                           [0, 0, 0, 0]])
+        assert (S == answer).all()
+        assert not np.diag(reachability(A)).any()
+
+    def testBIC(self):
+        A, total = learnstructure(self.data, self.nstates)
+        self.assertSkeleton(A)
+        empty, emptytotal = learnstructure(self.data, self.nstates, maxit=0)
+        assert not empty.any()
+        assert total > emptytotal
+
+    def testBDeu(self):
+        A, total = learnstructure(self.data, self.nstates, score='BDeu')
+        self.assertSkeleton(A)
+
+    def testWorkers(self):
+        A, total = learnstructure(self.data, self.nstates)
+        B, btotal = learnstructure(self.data, self.nstates, workers=2)
+        assert np.allclose(total, btotal)
+        self.assertSkeleton(B)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(learnstructureTestCase("testBIC"))
+    suite.addTest(learnstructureTestCase("testBDeu"))
+    suite.addTest(learnstructureTestCase("testWorkers"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+import io
+import os
+import json
+import tempfile
+import contextlib
+sys.path.append("..")
+from brml.potential import Potential
+from brml.setstate import setstate
+from brml.myzeros import myzeros
+from brml.subv2ind import subv2ind
+from brml.dag import dag
+from brml.logger import tracing
+import numpy as np
+
+
+class loggerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = Potential()
+        self.pot.variables = np.array([0])
+        self.pot.card = np.array([2])
+        self.pot.table = np.array([0.2, 0.8])
+
+    def tearDown(self):
+        self.pot = None
+
+    def run_silently(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            setstate(self.pot, 0, 1, 0.5)
+            myzeros(3)
+            subv2ind(np.array([2, 2]), np.array([1, 1]))
+            dag([self.pot])
+            self.pot / self.pot
+        return out.getvalue()
+
+    def testSilent(self):
+        self.assertEqual(self.run_silently(), '')
+
+    def testTraceFile(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            with tracing(path):
+                self.run_silently()
+            with open(path) as f:
+                events = [json.loads(line) for line in f]
+        finally:
+            os.remove(path)
+        self.assertEqual([e['operation'] for e in events],
+                         ['setstate', 'dag', 'divide'])
+        self.assertEqual(events[0]['inputs'], [[2]])
+        self.assertEqual(events[0]['output'], [2])
+        assert all(e['duration'] >= 0 for e in events)
+
+    def testSink(self):
+        events = []
+        with tracing(events.append):
+            self.pot / self.pot
+        self.pot / self.pot
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['inputs'], [[2], [2]])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(loggerTestCase("testSilent"))
+    suite.addTest(loggerTestCase("testTraceFile"))
+    suite.addTest(loggerTestCase("testSink"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
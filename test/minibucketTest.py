@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.minibucket import minibucket, partitionbounds, marginalbounds
+from brml.parallel import query
+from brml.setpot import setpot
+from brml.multpots import multpots
+from helpers import randomnet
+import numpy as np
+
+
+class minibucketTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = randomnet(12, 3, 5)
+        # variable 0 has no parents, so its potential is fully clamped
+        self.ev, self.states = np.array([11, 6, 0]), np.array([2, 0, 1])
+        self.evpot = [setpot(p, self.ev[np.isin(self.ev, p.variables)],
+                             self.states[np.isin(self.ev, p.variables)])
+                      for p in self.pot]
+        joint = multpots([p for p in self.evpot if p.variables.size])
+        constant = np.prod([np.sum(p.table) for p in self.evpot
+                            if p.variables.size == 0])
+        self.logz = np.log(np.sum(joint.table) * constant)
+
+    def testExact(self):
+        lower, upper = partitionbounds(self.evpot, ibound=12)
+        self.assertAlmostEqual(lower, self.logz)
+        self.assertAlmostEqual(upper, self.logz)
+        self.assertAlmostEqual(minibucket(self.pot, 12), 0.0)
+
+    def testBounds(self):
+        for ibound in (1, 2, 3):
+            lower, upper = partitionbounds(self.evpot, ibound)
+            self.assertTrue(lower <= self.logz + 1e-12)
+            self.assertTrue(upper >= self.logz - 1e-12)
+        exact = query(self.pot, [3], self.ev, self.states).table
+        for ibound in (2, 3, 12):
+            lower, upper = marginalbounds(self.pot, 3, ibound, self.ev,
+                                          self.states)
+            self.assertTrue((lower <= exact + 1e-12).all())
+            self.assertTrue((upper >= exact - 1e-12).all())
+        np.testing.assert_allclose(lower, exact)
+        np.testing.assert_allclose(upper, exact)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(minibucketTestCase("testExact"))
+    suite.addTest(minibucketTestCase("testBounds"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
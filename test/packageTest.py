@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+import os
+import subprocess
+sys.path.append("..")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(statement):
+    # run statement in a fresh interpreter and return what it prints
+    script = "import sys\nsys.path.insert(0, %r)\n%s" % (ROOT, statement)
+    out = subprocess.run([sys.executable, '-c', script],
+                         capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+
+class packageTestCase(unittest.TestCase):
+    def testImportIsLazy(self):
+        out = run("import brml\n"
+                  "print(sorted(m for m in sys.modules if 'brml' in m))\n"
+                  "print('numpy' in sys.modules)")
+        self.assertEqual(out, ["['brml']", "False"])
+
+    def testAttributeLoadsSubmodule(self):
+        out = run("import brml\n"
+                  "print(brml.JunctionTree.__name__)\n"
+                  "print('brml.jtree' in sys.modules)\n"
+                  "print('brml.hmm' in sys.modules)")
+        self.assertEqual(out, ["JunctionTree", "True", "False"])
+
+    def testFunctionNotHiddenBySubmodule(self):
+        out = run("import brml\n"
+                  "import brml.parallel\n"
+                  "import brml.setpot\n"
+                  "print(callable(brml.setpot))\n"
+                  "print(brml.setpot.__module__)")
+        self.assertEqual(out, ["True", "brml.setpot"])
+
+    def testStarImport(self):
+        out = run("from brml import *\n"
+                  "print(jtree.JunctionTree.__name__)")
+        self.assertEqual(out, ["JunctionTree"])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(packageTestCase("testImportIsLazy"))
+    suite.addTest(packageTestCase("testAttributeLoadsSubmodule"))
+    suite.addTest(packageTestCase("testFunctionNotHiddenBySubmodule"))
+    suite.addTest(packageTestCase("testStarImport"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+from unittest import mock
+from multiprocessing import shared_memory
+sys.path.append("..")
+from brml.parallel import QueryExecutor, query, components
+from brml.potential import Potential
+import numpy as np
+
+
+def tablesum(pot, i):
+    return float(np.sum(pot[i].table))
+
+
+class parallelTestCase(unittest.TestCase):
+    def setUp(self):
+        # demoBurglar network plus an unconnected variable 4
+        burglar, earthquake, alarm, radio = range(4)
+        yes, no = 0, 1
+        self.pot = [Potential() for i in range(5)]
+        self.pot[burglar].variables = np.array([burglar])
+        self.pot[burglar].card = np.array([2])
+        self.pot[burglar].table = np.array([0.01, 0.99])
+        self.pot[earthquake].variables = np.array([earthquake])
+        self.pot[earthquake].card = np.array([2])
+        self.pot[earthquake].table = np.array([0.000001, 0.999999])
+        table = np.zeros((2, 2, 2))
+        table[yes, yes, yes] = 0.9999
+        table[yes, yes, no] = 0.99
+        table[yes, no, yes] = 0.99
+        table[yes, no, no] = 0.0001
+        table[no] = 1 - table[yes]
+        self.pot[alarm].variables = np.array([alarm, burglar, earthquake])
+        self.pot[alarm].card = np.array([2, 2, 2])
+        self.pot[alarm].table = table
+        self.pot[radio].variables = np.array([radio, earthquake])
+        self.pot[radio].card = np.array([2, 2])
+        self.pot[radio].table = np.array([[1.0, 0.0], [0.0, 1.0]])
+        self.pot[4].variables = np.array([4])
+        self.pot[4].card = np.array([3])
+        self.pot[4].table = np.array([0.2, 0.3, 0.5])
+
+    def tearDown(self):
+        self.pot = None
+
+    def testQuery(self):
+        post = query(self.pot, 0, [2], [0], subset=[0, 1, 2, 3])
+        assert np.allclose(post.variables, [0])
+        assert np.allclose(post.table, [0.99000198, 0.00999802])
+        post = query(self.pot, 0, [3, 2], [0, 0], subset=[0, 1, 2, 3])
+        assert np.allclose(post.table, [0.01009899, 0.98990101])
+
+    def testComponents(self):
+        self.assertEqual(sorted(components(self.pot)),
+                         [[0, 1, 2, 3], [4]])
+
+    def testExecutor(self):
+        queries = [(0, [2], [0], [0, 1, 2, 3]),
+                   (0, [3, 2], [0, 0], [0, 1, 2, 3]),
+                   (4, None, None, [4]),
+                   (1, [2, 3], [0, 1])]
+        with QueryExecutor(self.pot, workers=2) as ex:
+            result = ex.map(queries)
+            total = ex.submit(tablesum, 2).result()
+        for q, post in zip(queries, result):
+            answer = query(self.pot, q[0], q[1] or (), q[2] or (),
+                           q[3] if len(q) > 3 else None)
+            assert np.allclose(post.variables, answer.variables)
+            assert np.allclose(post.table, answer.table)
+        assert np.allclose(result[2].table, [0.2, 0.3, 0.5])
+        self.assertEqual(total, 4.0)
+
+    def testPoolError(self):
+        # the shared memory is released if the pool cannot be created
+        created = []
+        SharedMemory = shared_memory.SharedMemory
+
+        def record(*args, **kwargs):
+            created.append(SharedMemory(*args, **kwargs))
+            return created[-1]
+        with mock.patch.object(shared_memory, 'SharedMemory', record):
+            self.assertRaises(ValueError, QueryExecutor, self.pot, workers=0)
+        self.assertEqual(len(created), 1)
+        self.assertRaises(FileNotFoundError, SharedMemory,
+                          name=created[0].name)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(parallelTestCase("testQuery"))
+    suite.addTest(parallelTestCase("testComponents"))
+    suite.addTest(parallelTestCase("testExecutor"))
+    suite.addTest(parallelTestCase("testPoolError"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
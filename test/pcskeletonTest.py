@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.pcskeleton import pcskeleton, condindep
+from brml.pcorient import pcorient
+import numpy as np
+
+
+class pcskeletonTestCase(unittest.TestCase):
+    def setUp(self):
+        # collider 0 -> 2 <- 1, then 2 -> 3
+        rng = np.random.RandomState(0)
+        n = 20000
+        x0 = rng.randint(0, 2, n)
+        x1 = rng.randint(0, 2, n)
+        x2 = np.where(rng.rand(n) < 0.9, x0 | x1, rng.randint(0, 2, n))
+        x3 = np.where(rng.rand(n) < 0.8, x2, 1 - x2)
+        self.data = np.column_stack([x0, x1, x2, x3])
+        self.nstates = [2, 2, 2, 2]
+
+    def tearDown(self):
+        self.data = None
+
+    def testSkeleton(self):
+        S, sepset = pcskeleton(self.data, self.nstates)
+        answer = np.array([[0, 0, 1, 0],
+                           [0, 0, 1, 0],
+                           [1, 1, 0, 1],
+                           [0, 0, 1, 0]])
+        assert (S == answer).all()
+        self.assertEqual(sepset[(0, 1)], ())
+        self.assertEqual(sepset[(0, 3)], (2,))
+
+    def testOrient(self):
+        S, sepset = pcskeleton(self.data, self.nstates)
+        A = pcorient(S, sepset)
+        answer = np.array([[0, 0, 1, 0],
+                           [0, 0, 1, 0],
+                           [0, 0, 0, 1],
+                           [0, 0, 0, 0]])
+        assert (A == answer).all()
+
+    def testExtension(self):
+        # chain 0 - 1 - 2 has no v-structure: undirected unless extended
+        S = np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]])
+        sepset = {(0, 2): (1,)}
+        A = pcorient(S, sepset, extend=False)
+        assert (A == S).all()
+        A = pcorient(S, sepset)
+        assert ((A + A.T) == S).all()
+        assert not (A[0, 1] and A[2, 1])
+
+    def testCondindep(self):
+        # the shared count tables give the tests of the pairs one by one
+        rows = self.data
+        weights = np.ones(rows.shape[0])
+        nstates = np.array(self.nstates)
+        pairs = [(0, 1), (0, 3), (1, 3)]
+        together = condindep(rows, weights, nstates, pairs, (2,))
+        alone = [condindep(rows, weights, nstates, [p], (2,))[0]
+                 for p in pairs]
+        self.assertEqual(list(together), alone)
+        self.assertEqual(list(together), [False, True, True])
+
+    def testWorkers(self):
+        S, sepset = pcskeleton(self.data, self.nstates)
+        T, tsepset = pcskeleton(self.data, self.nstates, workers=2)
+        assert (S == T).all()
+        self.assertEqual(sepset, tsepset)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(pcskeletonTestCase("testSkeleton"))
+    suite.addTest(pcskeletonTestCase("testOrient"))
+    suite.addTest(pcskeletonTestCase("testExtension"))
+    suite.addTest(pcskeletonTestCase("testCondindep"))
+    suite.addTest(pcskeletonTestCase("testWorkers"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+import json
+import threading
+sys.path.append("..")
+from brml.potential import Potential
+from brml.multpots import multpots
+from brml.setpot import setpot
+from brml.condpot import condpot
+from brml.orderpot import orderpot
+from brml.profiler import Profiler
+import brml.profiler
+import numpy as np
+
+
+class profilerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = [Potential() for i in range(2)]
+        self.pot[0].variables = np.array([0])
+        self.pot[0].card = np.array([2])
+        self.pot[0].table = np.array([0.3, 0.7])
+        self.pot[1].variables = np.array([1, 0])
+        self.pot[1].card = np.array([3, 2])
+        self.pot[1].table = np.array([[0.2, 0.5], [0.3, 0.1], [0.5, 0.4]])
+
+    def tearDown(self):
+        self.pot = None
+        brml.profiler.disable()
+        brml.profiler.reset()
+
+    def query(self):
+        joint = multpots(self.pot)
+        orderpot(joint, [1, 0])
+        return condpot(setpot(joint, np.array([1]), np.array([2])), 0)
+
+    def testQuery(self):
+        with Profiler() as prof:
+            self.query()
+        r = prof.report()
+        ops = r['operations']
+        self.assertEqual(ops['multiply']['calls'], 1)
+        self.assertEqual(ops['multiply']['cells'], 2 + 6 + 6)
+        self.assertEqual(ops['multiply']['peakcells'], 6)
+        self.assertEqual(ops['setpot']['calls'], 1)
+        self.assertEqual(ops['orderpot']['calls'], 1)
+        self.assertEqual(ops['condpot']['calls'], 1)
+        self.assertEqual(r['peakcells'], 6)
+        assert r['time'] >= ops['multpots']['time']
+        self.assertEqual(json.loads(prof.tojson()), r)
+
+        self.query()
+        self.assertEqual(prof.report(), r)
+
+    def testThreads(self):
+        # concurrent queries each see only their own operations
+        barrier = threading.Barrier(2)
+        reports = {}
+
+        def run(n):
+            with Profiler() as prof:
+                barrier.wait()
+                for i in range(n):
+                    self.query()
+                barrier.wait()
+            reports[n] = prof.report()
+        threads = [threading.Thread(target=run, args=(n,)) for n in (1, 3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for n in (1, 3):
+            self.assertEqual(reports[n]['operations']['setpot']['calls'], n)
+
+    def testGlobal(self):
+        brml.profiler.enable()
+        brml.profiler.enable()
+        self.query()
+        self.query()
+        self.assertEqual(
+            brml.profiler.report()['operations']['setpot']['calls'], 2)
+        brml.profiler.disable()
+        self.query()
+        self.assertEqual(
+            brml.profiler.report()['operations']['setpot']['calls'], 2)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(profilerTestCase("testQuery"))
+    suite.addTest(profilerTestCase("testThreads"))
+    suite.addTest(profilerTestCase("testGlobal"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
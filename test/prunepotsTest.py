@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.prunepots import prunepots, relevant
+from brml.parallel import query
+from brml.multpots import multpots
+from brml.condpot import condpot
+from brml.setpot import setpot
+from brml.potential import Potential
+from helpers import randomnet
+import numpy as np
+
+
+class prunepotsTestCase(unittest.TestCase):
+    def setUp(self):
+        # demoBurglar
+        burglar, earthquake, alarm, radio = range(4)
+        yes, no = 0, 1
+        self.pot = [Potential() for i in range(4)]
+        self.pot[burglar].variables = np.array([burglar])
+        self.pot[burglar].card = np.array([2])
+        self.pot[burglar].table = np.array([0.01, 0.99])
+        self.pot[earthquake].variables = np.array([earthquake])
+        self.pot[earthquake].card = np.array([2])
+        self.pot[earthquake].table = np.array([0.000001, 0.999999])
+        table = np.zeros((2, 2, 2))
+        table[yes, yes, yes] = 0.9999
+        table[yes, yes, no] = 0.99
+        table[yes, no, yes] = 0.99
+        table[yes, no, no] = 0.0001
+        table[no] = 1 - table[yes]
+        self.pot[alarm].variables = np.array([alarm, burglar, earthquake])
+        self.pot[alarm].card = np.array([2, 2, 2])
+        self.pot[alarm].table = table
+        self.pot[radio].variables = np.array([radio, earthquake])
+        self.pot[radio].card = np.array([2, 2])
+        self.pot[radio].table = np.array([[1.0, 0.0], [0.0, 1.0]])
+
+    def testBurglar(self):
+        # radio is barren given alarm
+        self.assertEqual(relevant(self.pot, [0], [2]), [0, 1, 2])
+        # burglar is d-separated from radio without the alarm
+        self.assertEqual(relevant(self.pot, [0], [3]), [0])
+        self.assertEqual(relevant(self.pot, [0]), [0])
+        newpot = prunepots(self.pot, [0], [2], [0])
+        posterior = condpot(multpots(newpot), np.array([0]))
+        np.testing.assert_allclose(posterior.table,
+                                   query(self.pot, [0], [2], [0]).table)
+
+    def testRandom(self):
+        pot = randomnet(12, 3, 1)
+        rng = np.random.RandomState(0)
+        for trial in range(10):
+            nodes = rng.permutation(12)
+            q, ev = nodes[:1], nodes[1:4]
+            states = rng.randint(0, 3, size=3)
+            newpot = prunepots(pot, q, ev, states)
+            posterior = condpot(multpots(newpot), q)
+            np.testing.assert_allclose(posterior.table,
+                                       query(pot, q, ev, states).table)
+
+    def testSetpot(self):
+        p = Potential()
+        p.variables = np.array([3, 1, 2])
+        p.card = np.array([2, 3, 4])
+        p.table = np.arange(24.0).reshape(2, 3, 4)
+        newpot = setpot(p, np.array([1]), np.array([2]))
+        np.testing.assert_array_equal(newpot.variables, [2, 3])
+        np.testing.assert_array_equal(newpot.table, p.table[:, 2, :].T)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(prunepotsTestCase("testBurglar"))
+    suite.addTest(prunepotsTestCase("testRandom"))
+    suite.addTest(prunepotsTestCase("testSetpot"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
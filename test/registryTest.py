@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.registry import VariableRegistry
+from brml.variable import Variable
+from helpers import randomnet, pot
+import numpy as np
+
+
+class registryTestCase(unittest.TestCase):
+    def testBuild(self):
+        net = randomnet(30, 3, 7)
+        registry = VariableRegistry(net)
+        self.assertEqual(len(registry), 30)
+        for p in net:
+            np.testing.assert_array_equal(registry.card(p.variables),
+                                          np.shape(p.table))
+        self.assertEqual(registry.card(3), np.shape(net[3].table)[0])
+        self.assertRaises(ValueError, registry.card, 30)
+        self.assertRaises(ValueError, registry.card, [0, -1])
+
+    def testIncremental(self):
+        registry = VariableRegistry()
+        registry.add(pot([0, 1], np.ones((2, 3))))
+        registry.add(pot([5, 1], np.ones((4, 3))))
+        np.testing.assert_array_equal(registry.variables(), [0, 1, 5])
+        np.testing.assert_array_equal(registry.card([5, 0, 1]), [4, 2, 3])
+        self.assertIn(5, registry)
+        self.assertNotIn(3, registry)
+
+    def testConflicts(self):
+        registry = VariableRegistry([pot([0, 1], np.ones((2, 3)))])
+        with self.assertRaises(ValueError):
+            registry.add(pot([1, 2], np.ones((2, 2))))
+        # the registry is unchanged by a rejected potential
+        self.assertNotIn(2, registry)
+        self.assertEqual(registry.card(1), 3)
+        with self.assertRaises(ValueError):
+            VariableRegistry([pot([3], np.ones(2)),
+                              pot([4, 3], np.ones((2, 3)))])
+
+    def testVariables(self):
+        variable = [Variable('burglar', ['yes', 'no']), None,
+                    Variable('alarm', ['yes', 'no', 'maybe'])]
+        registry = VariableRegistry([pot([0, 1], np.ones((2, 4)))], variable)
+        self.assertEqual(registry.name(2), 'alarm')
+        self.assertEqual(registry.domain(0), ['yes', 'no'])
+        self.assertEqual(registry.card(2), 3)
+        self.assertEqual(registry.variable(0).name, 'burglar')
+        self.assertIsNone(registry.name(1))
+        with self.assertRaises(ValueError):
+            registry.add(pot([2], np.ones(2)))
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(registryTestCase("testBuild"))
+    suite.addTest(registryTestCase("testIncremental"))
+    suite.addTest(registryTestCase("testConflicts"))
+    suite.addTest(registryTestCase("testVariables"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
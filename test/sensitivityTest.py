@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import copy
+import sys
+sys.path.append("..")
+from brml.sensitivity import sensitivity
+from brml.parallel import query
+from helpers import randomnet
+import numpy as np
+
+
+class sensitivityTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = randomnet(8, 3, 6)
+
+    def testFiniteDifference(self):
+        evidence = {7: 2, 5: 0}
+        grads = sensitivity(self.pot, 1, evidence)
+        self.assertEqual(len(grads), len(self.pot))
+        rng = np.random.RandomState(0)
+        eps = 1e-6
+        for trial in range(10):
+            i = rng.randint(len(self.pot))
+            entry = tuple(rng.randint(n) for n in self.pot[i].table.shape)
+            self.assertEqual(grads[i].shape,
+                             (3,) + self.pot[i].table.shape)
+            pot = copy.deepcopy(self.pot)
+            pot[i].table[entry] += eps
+            up = query(pot, [1], [7, 5], [2, 0]).table
+            pot[i].table[entry] -= 2 * eps
+            down = query(pot, [1], [7, 5], [2, 0]).table
+            np.testing.assert_allclose(grads[i][(slice(None),) + entry],
+                                       (up - down) / (2 * eps), atol=1e-6)
+
+    def testObserved(self):
+        self.assertRaises(ValueError, sensitivity, self.pot, 7, {7: 1})
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(sensitivityTestCase("testFiniteDifference"))
+    suite.addTest(sensitivityTestCase("testObserved"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+import os
+import tempfile
+import threading
+sys.path.append("..")
+from brml.server import InferenceServer, InferenceClient
+from brml.batchcondpot import batchcondpot
+from brml.parallel import query
+from helpers import burglarnet
+import numpy as np
+
+
+class serverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = burglarnet()
+
+    def tearDown(self):
+        self.pot = None
+
+    def testBatchcondpot(self):
+        tables = batchcondpot(self.pot, [0], [2, 3], [[0, 1], [0, 0]])
+        assert np.allclose(tables, [[0.99009901, 0.00990099],
+                                    [0.01009899, 0.98990101]])
+        tables = batchcondpot(self.pot, [3, 0], [2], [[0], [1]])
+        for b in range(2):
+            answer = query(self.pot, [0, 3], [2], [b])
+            assert np.allclose(tables[b], answer.table.T)
+
+    def testServer(self):
+        server = InferenceServer({'burglar': self.pot}, batchwindow=0.01)
+        address = server.start()
+        try:
+            results = {}
+
+            def ask(i):
+                client = InferenceClient(address)
+                results[i] = client.posterior('burglar', [0],
+                                              {2: 0, 3: i % 2})
+                client.close()
+            threads = [threading.Thread(target=ask, args=(i,))
+                       for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            for i in range(8):
+                answer = [0.99009901, 0.00990099] if i % 2 else \
+                    [0.01009899, 0.98990101]
+                assert np.allclose(results[i], answer)
+
+            client = InferenceClient(address)
+            states, prob = client.map('burglar', [0, 1], {2: 0})
+            self.assertEqual(states, [0, 1])
+            self.assertRaises(ValueError, client.posterior, 'nonet', [0])
+            stats = client.stats()
+            self.assertEqual(stats['count'], 9)
+            assert stats['p50'] <= stats['p99']
+            client.close()
+        finally:
+            server.stop()
+
+    def testBatching(self):
+        # the window is longer than the test, so the requests are only
+        # answered once all eight are queued, as one batch
+        server = InferenceServer({'burglar': self.pot}, batchwindow=60.0,
+                                 maxbatch=8)
+        address = server.start()
+        try:
+            results = {}
+
+            def ask(i):
+                client = InferenceClient(address)
+                results[i] = client.posterior('burglar', [0],
+                                              {2: 0, 3: i % 2})
+                client.close()
+            threads = [threading.Thread(target=ask, args=(i,))
+                       for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(results), 8)
+            self.assertEqual(list(server.batchsizes), [8])
+        finally:
+            server.stop()
+
+    def testBadRequest(self):
+        # the bad requests are sent with good ones of the same batch key
+        # and are rejected on their own; the batch only closes once both
+        # good requests are in it
+        server = InferenceServer({'burglar': self.pot}, batchwindow=60.0,
+                                 maxbatch=2)
+        address = server.start()
+        try:
+            results = {}
+            evidence = [{2: 0}, {2: 7}, {2: -1}, {2: 1}]
+
+            def ask(i):
+                client = InferenceClient(address)
+                try:
+                    results[i] = client.posterior('burglar', [0],
+                                                  evidence[i])
+                except ValueError as e:
+                    results[i] = str(e)
+                client.close()
+            threads = [threading.Thread(target=ask, args=(i,))
+                       for i in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert np.allclose(results[0], [0.99000198, 0.00999802])
+            assert np.allclose(results[3], query(self.pot, [0], [2],
+                                                 [1]).table)
+            self.assertIn('out of range', results[1])
+            self.assertIn('out of range', results[2])
+            self.assertEqual(list(server.batchsizes), [2])
+        finally:
+            server.stop()
+        self.assertRaises(ValueError, batchcondpot, self.pot, [0], [2],
+                          [[0], [-1]])
+
+    def testUnixSocket(self):
+        path = os.path.join(tempfile.mkdtemp(), 'brml.sock')
+        server = InferenceServer({'burglar': self.pot}, address=path)
+        server.start()
+        try:
+            client = InferenceClient(path)
+            assert np.allclose(client.posterior('burglar', [0], {2: 0}),
+                               [0.99000198, 0.00999802])
+            client.close()
+        finally:
+            server.stop()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(serverTestCase("testBatchcondpot"))
+    suite.addTest(serverTestCase("testServer"))
+    suite.addTest(serverTestCase("testBatching"))
+    suite.addTest(serverTestCase("testBadRequest"))
+    suite.addTest(serverTestCase("testUnixSocket"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
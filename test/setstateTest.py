@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.setstate import setstate
+from brml.potential import Potential
+import numpy as np
+
+
+class setstateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = Potential()
+        self.pot.variables = np.array([4, 1, 7])
+        self.pot.card = np.array([2, 3, 4])
+        self.pot.table = np.arange(24.0).reshape(2, 3, 4)
+
+    def testSingle(self):
+        pot = Potential()
+        pot.variables = np.array([0])
+        pot.card = np.array([3])
+        pot.table = np.array([0.2, 0.3, 0.5])
+        newpot = setstate(pot, 0, 2, 0.0)
+        np.testing.assert_array_equal(newpot.table, [0.2, 0.3, 0.0])
+        np.testing.assert_array_equal(pot.table, [0.2, 0.3, 0.5])
+
+    def testSubstate(self):
+        newpot = setstate(self.pot, [7, 4, 9], [3, 1, 0], -1.0)
+        expected = self.pot.table.copy()
+        expected[1, :, 3] = -1.0
+        np.testing.assert_array_equal(newpot.table, expected)
+        newpot = setstate(self.pot, 1, 0, 0.0)
+        expected = self.pot.table.copy()
+        expected[:, 0, :] = 0.0
+        np.testing.assert_array_equal(newpot.table, expected)
+
+    def testBatch(self):
+        states = np.array([[0, 2], [1, 0], [2, 3]])
+        newpot = setstate(self.pot, [1, 7], states, [10.0, 20.0, 30.0])
+        expected = self.pot.table.copy()
+        for (s1, s7), val in zip(states, [10.0, 20.0, 30.0]):
+            expected[:, s1, s7] = val
+        np.testing.assert_array_equal(newpot.table, expected)
+
+    def testRepeated(self):
+        newpot = setstate(self.pot, [7, 4, 7], [3, 1, 3], -1.0)
+        expected = self.pot.table.copy()
+        expected[1, :, 3] = -1.0
+        np.testing.assert_array_equal(newpot.table, expected)
+        states = np.array([[0, 2, 0], [1, 0, 1]])
+        newpot = setstate(self.pot, [1, 7, 1], states, [10.0, 20.0])
+        expected = self.pot.table.copy()
+        expected[:, 0, 2] = 10.0
+        expected[:, 1, 0] = 20.0
+        np.testing.assert_array_equal(newpot.table, expected)
+        self.assertRaises(ValueError, setstate, self.pot, [7, 4, 7],
+                          [3, 1, 2], -1.0)
+        self.assertRaises(ValueError, setstate, self.pot, [1, 1],
+                          [[0, 0], [1, 2]], 0.0)
+
+    def testInplace(self):
+        table = self.pot.table
+        newpot = setstate(self.pot, 4, 0, 0.0, inplace=True)
+        self.assertTrue(newpot is self.pot)
+        self.assertTrue(newpot.table is table)
+        self.assertTrue((table[0] == 0).all())
+        self.assertTrue((table[1] > 0).all())
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(setstateTestCase("testSingle"))
+    suite.addTest(setstateTestCase("testSubstate"))
+    suite.addTest(setstateTestCase("testBatch"))
+    suite.addTest(setstateTestCase("testRepeated"))
+    suite.addTest(setstateTestCase("testInplace"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.sparsedag import SparseDAG
+from brml.dag import dag
+from brml.potential import Potential
+import numpy as np
+
+
+class sparsedagTestCase(unittest.TestCase):
+    def setUp(self):
+        # burglar network, potentials listed in a different order than
+        # their variables: p(radio|earthquake) p(alarm|burglar,earthquake)
+        # p(earthquake) p(burglar)
+        burglar, earthquake, alarm, radio = range(4)
+        self.pot = [Potential() for i in range(4)]
+        self.pot[0].variables = np.array([radio, earthquake])
+        self.pot[1].variables = np.array([alarm, burglar, earthquake])
+        self.pot[2].variables = np.array([earthquake])
+        self.pot[3].variables = np.array([burglar])
+        self.A = np.array([[0, 0, 1, 0],
+                           [0, 0, 1, 1],
+                           [0, 0, 0, 0],
+                           [0, 0, 0, 0]])
+
+    def tearDown(self):
+        self.pot = None
+
+    def testDag(self):
+        assert (dag(self.pot) == self.A).all()
+        G = SparseDAG.fromdense(self.A)
+        assert (G.todense() == self.A).all()
+        self.assertEqual(G.nedges(), 3)
+
+    def testQueries(self):
+        G = SparseDAG.frompots(self.pot)
+        self.assertEqual(list(G.parents(2)), [0, 1])
+        self.assertEqual(list(G.children(1)), [2, 3])
+        self.assertEqual(list(G.markovblanket(0)), [1, 2])
+        self.assertEqual(list(G.ancestors([2])), [0, 1])
+        self.assertEqual(list(G.ancestors([3, 1])), [])
+        self.assertEqual(list(G.descendants(1)), [2, 3])
+        order = list(G.toporder())
+        for i, j in zip(*np.nonzero(self.A)):
+            assert order.index(i) < order.index(j)
+
+    def testCycle(self):
+        G = SparseDAG(3, [0, 1, 2], [1, 2, 0])
+        self.assertRaises(ValueError, G.toporder)
+
+    def testLarge(self):
+        # random DAG on 5000 nodes: parents have smaller index
+        rng = np.random.RandomState(0)
+        child = rng.randint(1, 5000, 20000)
+        parent = (rng.rand(20000) * child).astype(int)
+        G = SparseDAG(5000, parent, child)
+        order = np.argsort(G.toporder())
+        assert (order[G.paidx] < np.repeat(order, np.diff(G.paptr))).all()
+        anc = set(G.ancestors([4999]))
+        assert set(G.parents(4999)) <= anc
+        for a in anc:
+            assert set(G.parents(a)) <= anc
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(sparsedagTestCase("testDag"))
+    suite.addTest(sparsedagTestCase("testQueries"))
+    suite.addTest(sparsedagTestCase("testCycle"))
+    suite.addTest(sparsedagTestCase("testLarge"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+import sys
+sys.path.append("..")
+from brml.voi import voi
+from brml.jtree import JunctionTree
+from brml.parallel import query
+from helpers import randomnet
+import numpy as np
+
+
+def mutualinformation(joint):
+    px = joint.sum(axis=1, keepdims=True)
+    py = joint.sum(axis=0, keepdims=True)
+    mask = joint > 0
+    return np.sum(joint[mask] * np.log((joint / (px * py))[mask]))
+
+
+class voiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pot = randomnet(10, 3, 4)
+
+    def testGains(self):
+        jt = JunctionTree(self.pot)
+        gains = voi(jt, 0, evidence={9: 1})
+        self.assertEqual(sorted(gains), list(range(1, 9)))
+        for v in gains:
+            pair = query(self.pot, [0, v], [9], [1])
+            self.assertAlmostEqual(gains[v], mutualinformation(pair.table))
+
+    def testStateRestored(self):
+        jt = JunctionTree(self.pot)
+        jt.setevidence(9, 1)
+        before = jt.marginal(3).table
+        cached = len(jt._messages)
+        voi(jt, 0, [3, 5])
+        self.assertEqual(jt.evidence, {9: 1})
+        self.assertTrue(len(jt._messages) >= cached)
+        np.testing.assert_allclose(jt.marginal(3).table, before)
+        # the evidence argument is not left in the tree
+        gains = voi(jt, 0, [3, 5], evidence={7: 2})
+        self.assertEqual(jt.evidence, {9: 1})
+        np.testing.assert_allclose(jt.marginal(3).table, before)
+        with jt.suppose(7, 2):
+            expected = voi(jt, 0, [3, 5])
+        for v in (3, 5):
+            self.assertAlmostEqual(gains[v], expected[v])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(voiTestCase("testGains"))
+    suite.addTest(voiTestCase("testStateRestored"))
+
+    runner = unittest.TextTestRunner()
+    runner.run(suite)